@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import (HttpRequest, HttpResponse, HttpResponseNotAllowed,
+                         QueryDict)
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.renderers import FastJSONRenderer
+from foodgram_backend.constants import BATCH_CONCURRENCY, BATCH_MAX_REQUESTS
+from foodgram_backend.db_router import use_primary
+from foodgram_backend.middleware import PRIMARY_COOKIE
+
+logger = logging.getLogger('django.request')
+
+API_PREFIX = '/api/'
+# Заголовки внешнего запроса, которые не относятся к подзапросам.
+SKIPPED_META = (
+    'CONTENT_LENGTH',
+    'CONTENT_TYPE',
+    'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE',
+)
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json',
+    )
+
+
+def authenticate(request):
+    """Аутентифицирует пакет один раз для всех подзапросов."""
+    drf_request = Request(request, authenticators=[
+        authenticator() for authenticator in
+        api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    return drf_request.user, drf_request.auth
+
+
+def build_subrequest(request, path, user, auth):
+    """GET-подзапрос с метаданными исходного и готовым пользователем."""
+    url = urlsplit(path)
+    subrequest = HttpRequest()
+    subrequest.method = 'GET'
+    subrequest.path = subrequest.path_info = url.path
+    subrequest.META = {
+        key: value for key, value in request.META.items()
+        if key not in SKIPPED_META
+    }
+    subrequest.META.update(
+        REQUEST_METHOD='GET', PATH_INFO=url.path, QUERY_STRING=url.query
+    )
+    subrequest.GET = QueryDict(url.query)
+    subrequest.COOKIES = request.COOKIES
+    # DRF берёт пользователя отсюда и не аутентифицирует запрос повторно.
+    subrequest._force_auth_user = user
+    subrequest._force_auth_token = auth
+    return subrequest
+
+
+def dispatch(request, path, user, auth):
+    """Выполняет подзапрос через URL-резолвер без стека middleware.
+
+    Возвращает результат для ответа пакета и ответ подзапроса, который
+    нужно закрыть.
+    """
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        match = None
+    # Асинхронные представления (сам пакет, поток событий) не
+    # выполняются подзапросами.
+    if match is None or asyncio.iscoroutinefunction(match.func):
+        return {
+            'path': path,
+            'status': status.HTTP_404_NOT_FOUND,
+            'body': {'detail': 'Страница не найдена.'},
+        }, None
+    subrequest = build_subrequest(request, path, user, auth)
+    subrequest.resolver_match = match
+    # Подзапрос читает, как отдельный GET: с реплики, если клиент не
+    # закреплён за основной базой.
+    token = use_primary.set(PRIMARY_COOKIE in request.COOKIES)
+    try:
+        response = match.func(subrequest, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Ошибка подзапроса %s', path)
+        return {
+            'path': path,
+            'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+            'body': {'detail': 'Ошибка сервера.'},
+        }, None
+    finally:
+        use_primary.reset(token)
+    if not hasattr(response, 'data'):
+        return {
+            'path': path,
+            'status': status.HTTP_406_NOT_ACCEPTABLE,
+            'body': {'detail': 'Ответ подзапроса не в формате JSON.'},
+        }, response
+    return {
+        'path': path,
+        'status': response.status_code,
+        'body': response.data,
+    }, response
+
+
+def dispatch_group(request, paths, user, auth):
+    """Выполняет подзапросы по очереди в одном потоке пула.
+
+    Подзапросы потока работают через одни и те же соединения с БД.
+    Ответы (в том числе открытые файлы FileResponse) и соединения
+    закрываются один раз в конце: потоки пула не проходят через
+    обработчик запроса, который закрыл бы их сам.
+    """
+    results, responses = [], []
+    try:
+        for path in paths:
+            result, response = dispatch(request, path, user, auth)
+            results.append(result)
+            if response is not None:
+                responses.append(response)
+    finally:
+        for response in responses:
+            response.close()
+        connections.close_all()
+    return results
+
+
+def parse_paths(body):
+    try:
+        paths = json.loads(body).get('requests')
+    except (ValueError, AttributeError):
+        paths = None
+    if not isinstance(paths, list) or not all(
+        isinstance(path, str) and path.startswith(API_PREFIX)
+        for path in paths
+    ):
+        raise ValueError(
+            'Ожидается {"requests": [...]} со списком путей /api/.'
+        )
+    if len(paths) > BATCH_MAX_REQUESTS:
+        raise ValueError(
+            f'В пакете не больше {BATCH_MAX_REQUESTS} подзапросов.'
+        )
+    return paths
+
+
+async def batch(request):
+    """Выполняет пакет GET-подзапросов к API за один HTTP-запрос.
+
+    Пользователь аутентифицируется один раз, подзапросы проходят через
+    URL-резолвер в процессе и выполняются параллельно не более чем в
+    BATCH_CONCURRENCY потоках пула. Ответы возвращаются в порядке
+    запросов. Пакет отправляется POST-запросом, но читает с реплик,
+    как GET-запросы: клиента закрепляет за основной базой только
+    подзапрос, который действительно что-то записал.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        paths = parse_paths(request.body)
+    except ValueError as error:
+        return json_response(
+            {'detail': str(error)}, status.HTTP_400_BAD_REQUEST
+        )
+    use_primary.set(PRIMARY_COOKIE in request.COOKIES)
+    try:
+        user, auth = await sync_to_async(authenticate)(request)
+    except APIException as error:
+        return json_response({'detail': error.detail}, error.status_code)
+    groups = [
+        list(range(start, len(paths), BATCH_CONCURRENCY))
+        for start in range(min(BATCH_CONCURRENCY, len(paths)))
+    ]
+    responses = [None] * len(paths)
+    for group, results in zip(groups, await asyncio.gather(*(
+        sync_to_async(dispatch_group, thread_sensitive=False)(
+            request, [paths[index] for index in group], user, auth
+        )
+        for group in groups
+    ))):
+        for index, result in zip(group, results):
+            responses[index] = result
+    return json_response(responses)
+
+
+# Декораторы Django 4.2 не поддерживают асинхронные представления,
+# а пакет аутентифицируется токеном, поэтому CSRF не нужен.
+batch.csrf_exempt = True
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from recipes.cache import get_user_version
+from recipes.shopping_list import get_cart_version
+
+
+def _user_versions(user):
+    if not user.is_authenticated:
+        return ()
+    return get_user_version(user.id), get_cart_version(user.id)
+
+
+def get_validators(request, *parts, last_modified=None):
+    """Возвращает ETag и Last-Modified ответа.
+
+    Ответы о рецептах зависят от избранного, корзины и подписок
+    пользователя, поэтому в валидаторы входят их версии.
+    """
+    versions = _user_versions(request.user)
+    etag = quote_etag(md5(repr((
+        request.get_full_path(),
+        request.user.id,
+        last_modified,
+        *versions,
+        *parts,
+    )).encode()).hexdigest())
+    if last_modified is not None:
+        last_modified = max([
+            last_modified,
+            *(
+                datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+                for version in versions
+            ),
+        ])
+    return etag, last_modified
+
+
+def conditional_response(request, etag, last_modified):
+    """Возвращает ответ 304, если у клиента актуальная версия."""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ('Authorization',))
+    return response
@@ -0,0 +1,135 @@
+import asyncio
+import json
+from time import monotonic
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import HttpResponseNotAllowed, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import APIException
+
+from api.batch import authenticate, json_response
+from foodgram_backend.constants import (SSE_CONNECTION_TIMEOUT,
+                                        SSE_HEARTBEAT_INTERVAL, SSE_RETRY)
+from recipes.events import author_channel, get_event_bus
+from users.models import Subscription
+
+
+def closing_connections(function):
+    """Запускает функцию в пуле потоков и закрывает её соединения с БД.
+
+    Поток событий живёт долго, и соединение не должно оставаться
+    занятым до его закрытия.
+    """
+    def wrapper(*args):
+        try:
+            return function(*args)
+        finally:
+            connections.close_all()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+def authenticate_stream(request):
+    """Пользователь из заголовка Authorization или параметра ?token=.
+
+    EventSource в браузере не умеет передавать заголовки, поэтому токен
+    принимается и в адресе.
+    """
+    user, _ = authenticate(request)
+    token = request.GET.get('token')
+    if not user.is_authenticated and token:
+        user, _ = TokenAuthentication().authenticate_credentials(token)
+    return user
+
+
+def followed_channels(user_id):
+    return [
+        author_channel(publisher_id) for publisher_id in
+        Subscription.objects.filter(follower=user_id).values_list(
+            'publisher', flat=True
+        )
+    ]
+
+
+def message(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def wait_disconnect(bus, listener, receive):
+    """Освобождает место соединения, как только клиент отключился."""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    bus.unsubscribe(listener)
+    # Будит поток, который ждёт следующего события.
+    listener.push(None)
+
+
+async def stream(bus, listener, receive):
+    """Поток событий соединения.
+
+    Между событиями отправляется комментарий-пульс. Поток завершается,
+    когда клиент отключился, и в любом случае через
+    SSE_CONNECTION_TIMEOUT: браузер переподключается сам. Список
+    авторов соединения обновляется сигналами подписок.
+    """
+    closes_at = monotonic() + SSE_CONNECTION_TIMEOUT
+    disconnect = None
+    if receive is not None:
+        disconnect = asyncio.ensure_future(
+            wait_disconnect(bus, listener, receive)
+        )
+    try:
+        yield f'retry: {SSE_RETRY * 1000}\n\n'
+        while monotonic() < closes_at:
+            event = await listener.get(SSE_HEARTBEAT_INTERVAL)
+            if not listener.active:
+                break
+            if event is not None:
+                yield message('recipe', event)
+            else:
+                yield ': ping\n\n'
+    finally:
+        if disconnect is not None:
+            disconnect.cancel()
+        bus.unsubscribe(listener)
+
+
+async def recipe_events(request):
+    """Server-sent events о новых рецептах авторов из подписок."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not isinstance(request, ASGIRequest):
+        return json_response(
+            {'detail': 'Поток событий доступен только через ASGI.'},
+            status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    try:
+        user = await closing_connections(authenticate_stream)(request)
+    except APIException as error:
+        return json_response({'detail': error.detail}, error.status_code)
+    if not user.is_authenticated:
+        return json_response(
+            {'detail': 'Учетные данные не были предоставлены.'},
+            status.HTTP_401_UNAUTHORIZED,
+        )
+    bus = get_event_bus()
+    listener = bus.subscribe(
+        user.id, await closing_connections(followed_channels)(user.id)
+    )
+    if listener is None:
+        response = json_response(
+            {'detail': 'Слишком много открытых соединений.'},
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response['Retry-After'] = SSE_RETRY
+        return response
+    response = StreamingHttpResponse(
+        stream(bus, listener, request.scope.get('receive')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток.
+    response['X-Accel-Buffering'] = 'no'
+    return response
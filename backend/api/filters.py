@@ -1,12 +1,52 @@
+from django.db.models import Case, IntegerField, When
+from django_filters.fields import MultipleChoiceField
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe
+from recipes.ingredient_search import search_ingredients
+from recipes.models import Recipe, Tag
+from recipes.registry import reference_data
 
 
 class IngredientFilter(SearchFilter):
+    """Нечёткий поиск ингредиентов по ?name= для списка."""
+
     search_param = 'name'
 
+    def filter_queryset(self, request, queryset, view):
+        query = ' '.join(self.get_search_terms(request))
+        if not query or getattr(view, 'detail', False):
+            return queryset
+        return search_ingredients(queryset, query)
+
+
+def tag_choices():
+    """Слаги тегов из реестра, без запроса к базе."""
+    return [(tag.slug, tag.name) for tag in reference_data.get()[Tag].values()]
+
+
+class TagSlugField(MultipleChoiceField):
+    """Слаги тегов: неизвестные реестру проверяются в базе.
+
+    Если слаг нашёлся в базе, реестр устарел и сбрасывается.
+    """
+
+    def valid_value(self, value):
+        if super().valid_value(value):
+            return True
+        if Tag.objects.filter(slug=value).exists():
+            reference_data.invalidate()
+            return True
+        return False
+
+
+class TagSlugFilter(filters.MultipleChoiceFilter):
+    field_class = TagSlugField
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
 
 class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(
@@ -16,11 +56,25 @@ class RecipeFilter(FilterSet):
         field_name='shopping_cart__user', method='filter_is_in_shopping_cart'
     )
 
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = TagSlugFilter(field_name='tags__slug', choices=tag_choices)
+    available_ingredients = NumberInFilter(
+        method='filter_available_ingredients'
+    )
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'Популярные'), ('trending', 'В тренде')),
+        method='order_by_score',
+    )
 
     class Meta:
         model = Recipe
-        fields = ['author', 'tags', 'is_favorited', 'is_in_shopping_cart']
+        fields = [
+            'author',
+            'tags',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'available_ingredients',
+            'ordering',
+        ]
 
     def filter_is_favorited(self, queryset, name, value):
         if value:
@@ -35,3 +89,29 @@ class RecipeFilter(FilterSet):
             if user and user.is_authenticated:
                 return queryset.filter(shopping_cart__user=user)
         return queryset
+
+    def filter_available_ingredients(self, queryset, name, value):
+        """Рецепты, которые можно приготовить из указанных ингредиентов.
+
+        Сортирует по числу недостающих ингредиентов по индексу в памяти.
+        """
+        # Индекс на NumPy загружается при первом таком запросе.
+        from recipes.ingredient_index import ingredient_index
+
+        ranked = ingredient_index.get().rank(int(item) for item in value)
+        return queryset.filter(
+            id__in=[recipe_id for recipe_id, _ in ranked]
+        ).annotate(
+            missing_ingredients=Case(
+                *(
+                    When(id=recipe_id, then=missing)
+                    for recipe_id, missing in ranked
+                ),
+                output_field=IntegerField(),
+            )
+        ).order_by('missing_ingredients', '-pub_date')
+
+    def order_by_score(self, queryset, name, value):
+        """Сортирует по заранее рассчитанной оценке популярности."""
+        field = 'popularity' if value == 'popular' else 'trending'
+        return queryset.order_by(f'-{field}', '-pub_date', '-id')
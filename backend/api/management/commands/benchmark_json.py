@@ -0,0 +1,55 @@
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeSerializer
+from foodgram_backend.constants import PAGE_SIZE
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Команда сравнения скорости JSON-рендереров на списке рецептов."""
+    help = 'Сравнивает JSONRenderer и FastJSONRenderer на RecipeSerializer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=PAGE_SIZE,
+            help='Количество рецептов в сериализуемом ответе'
+        )
+        parser.add_argument(
+            '--number', type=int, default=1000,
+            help='Количество повторов рендеринга'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.select_related('author').prefetch_related(
+            'tags', 'recipe_ingredients__ingredient'
+        )[:options['recipes']]
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        data = RecipeSerializer(
+            recipes, many=True, context={'request': request}
+        ).data
+        if not data:
+            self.stderr.write('В базе нет рецептов для замера.')
+            return
+        if orjson is None:
+            self.stderr.write('orjson не установлен, замер без ускорения.')
+        number = options['number']
+        results = {}
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            name = type(renderer).__name__
+            results[name] = timeit(
+                lambda: renderer.render(data), number=number
+            ) / number
+            self.stdout.write(
+                f'{name}: {results[name] * 1e6:.1f} мкс на ответ '
+                f'из {len(data)} рецептов'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Ускорение: '
+            f'{results["JSONRenderer"] / results["FastJSONRenderer"]:.1f}x'
+        ))
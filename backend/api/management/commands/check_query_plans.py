@@ -0,0 +1,165 @@
+import re
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, QuerySet
+
+from api.filters import RecipeFilter
+from recipes.ingredient_search import search_ingredients
+from recipes.models import (CartIngredient, Favorite, Ingredient, Recipe,
+                            RecipeIngredient, ShoppingCart)
+from recipes.shopping_list import cart_rows
+from users.models import Subscription
+from users.serializers import subscription_exists
+
+User = get_user_model()
+
+# Таблицы, которые растут вместе с числом пользователей и рецептов.
+LARGE_TABLES = {
+    model._meta.db_table for model in (
+        User, Subscription, Recipe, Recipe.tags.through, Ingredient,
+        RecipeIngredient, Favorite, ShoppingCart, CartIngredient,
+    )
+}
+# Псевдонимы таблиц подзапросов: "recipes_favorite" U0.
+ALIAS = re.compile(r'"(\w+)" (U\d+)')
+FULL_SCAN = {
+    'sqlite': re.compile(r'\bSCAN (\w+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+def recipe_filter(user, name, value):
+    filterset = RecipeFilter(
+        queryset=Recipe.objects.all(), request=SimpleNamespace(user=user)
+    )
+    return filterset.filters[name].filter(filterset.queryset, value)
+
+
+def recipe_flags(user):
+    return Recipe.objects.filter(author=user.id).annotate(
+        author_is_subscribed=subscription_exists(user, 'author'),
+        **{
+            name: Exists(model.objects.filter(
+                user=user.id, recipe=OuterRef('pk')
+            ))
+            for name, model in (
+                ('is_favorited', Favorite),
+                ('is_in_shopping_cart', ShoppingCart),
+            )
+        },
+    )
+
+
+# Название -> (построитель запроса по пользователю, базы или None для всех).
+# Поиск по началу названия без учёта регистра в SQLite не использует
+# индекс ни при какой схеме, поэтому проверяется только на PostgreSQL.
+HOT_QUERIES = {
+    'recipes_by_tags': (
+        lambda user: recipe_filter(user, 'tags', ['breakfast']), None
+    ),
+    'favorited_recipes': (
+        lambda user: recipe_filter(user, 'is_favorited', True), None
+    ),
+    'recipes_in_cart': (
+        lambda user: recipe_filter(user, 'is_in_shopping_cart', True), None
+    ),
+    'author_recipes_with_flags': (recipe_flags, None),
+    'recipe_composition': (
+        lambda user: RecipeIngredient.objects.filter(recipe=1).values(
+            'ingredient'
+        ),
+        None,
+    ),
+    'shopping_list': (lambda user: cart_rows(user.id), None),
+    'subscriptions': (
+        lambda user: User.objects.filter(following__follower=user.id), None
+    ),
+    'ingredient_prefix_search': (
+        lambda user: search_ingredients(Ingredient.objects.all(), 'мо'),
+        ('postgresql',),
+    ),
+    'ingredient_trigram_search': (
+        lambda user: search_ingredients(Ingredient.objects.all(), 'молоко'),
+        None,
+    ),
+}
+
+
+def explain(queryset, using):
+    """Возвращает план запроса.
+
+    На PostgreSQL последовательный просмотр отключается на время
+    EXPLAIN: он остаётся в плане, только если подходящего индекса нет,
+    и не зависит от размера таблиц в проверяемой базе.
+    """
+    with transaction.atomic(using=using):
+        if connections[using].vendor == 'postgresql':
+            with connections[using].cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.using(using).explain()
+
+
+def full_scans(queryset, plan, using):
+    """Большие таблицы, которые план просматривает целиком."""
+    pattern = FULL_SCAN.get(connections[using].vendor)
+    if pattern is None:
+        raise CommandError(
+            f'Разбор планов для {connections[using].vendor} не поддержан'
+        )
+    sql, _ = queryset.query.get_compiler(using).as_sql()
+    aliases = {
+        alias.lower(): table for table, alias in ALIAS.findall(sql)
+    }
+    return sorted({
+        aliases.get(table.lower(), table)
+        for table in pattern.findall(plan)
+    } & LARGE_TABLES)
+
+
+class Command(BaseCommand):
+    """Команда проверки планов частых запросов."""
+    help = (
+        'Выполняет EXPLAIN для частых запросов API и завершается с ошибкой, '
+        'если план полностью просматривает большую таблицу'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='Псевдоним базы данных для проверки'
+        )
+        parser.add_argument(
+            '--user', type=int, default=1,
+            help='id пользователя, подставляемый в запросы'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        vendor = connections[using].vendor
+        user = User(id=options['user'])
+        failed = []
+        for name, (build, vendors) in HOT_QUERIES.items():
+            queryset = None
+            if not vendors or vendor in vendors:
+                queryset = build(user)
+            if not isinstance(queryset, QuerySet):
+                self.stdout.write(f'{name}: пропущен для {vendor}')
+                continue
+            plan = explain(queryset, using)
+            scans = full_scans(queryset, plan, using)
+            if options['verbosity'] > 1:
+                self.stdout.write(plan)
+            if scans:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: полный просмотр {", ".join(scans)}'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+        if failed:
+            raise CommandError(
+                f'Запросы без подходящих индексов: {", ".join(failed)}'
+            )
@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+LOAD_URLS = (
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+
+
+class Command(BaseCommand):
+    """Команда профилирования времени импорта при старте воркера."""
+    help = (
+        'Показывает время импорта модулей при загрузке '
+        'foodgram_backend.wsgi (python -X importtime)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module', default='foodgram_backend.wsgi',
+            help='Импортируемый модуль'
+        )
+        parser.add_argument(
+            '--no-urls', action='store_true',
+            help='Не загружать URLconf (его воркер грузит на первом запросе)'
+        )
+        parser.add_argument(
+            '--group', action='store_true',
+            help='Суммировать собственное время по пакетам верхнего уровня'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=30,
+            help='Количество строк отчёта'
+        )
+
+    def run_importtime(self, code):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            },
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        rows = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            own, cumulative, name = line[len('import time:'):].split('|')
+            if not own.strip().isdigit():
+                continue
+            rows.append((
+                name.strip(),
+                int(own),
+                int(cumulative),
+                (len(name) - len(name.lstrip()) - 1) // 2,
+            ))
+        return rows
+
+    def handle(self, *args, **options):
+        code = f'import {options["module"]}'
+        if not options['no_urls']:
+            code = f'{code}; {LOAD_URLS}'
+        rows = self.run_importtime(code)
+        total = sum(row[2] for row in rows if not row[3])
+        self.stdout.write(
+            f'Всего: {total / 1000:.1f} мс, модулей: {len(rows)}'
+        )
+        if options['group']:
+            packages = Counter()
+            for name, own, _, _ in rows:
+                packages[name.split('.')[0]] += own
+            self.stdout.write(f'{"собств., мс":>12}  пакет')
+            for package, own in packages.most_common(options['limit']):
+                self.stdout.write(f'{own / 1000:>12.1f}  {package}')
+            return
+        self.stdout.write(f'{"всего, мс":>10}{"собств., мс":>13}  модуль')
+        for name, own, cumulative, _ in sorted(
+            rows, key=lambda row: row[2], reverse=True
+        )[:options['limit']]:
+            self.stdout.write(
+                f'{cumulative / 1000:>10.1f}{own / 1000:>13.1f}  {name}'
+            )
@@ -0,0 +1,134 @@
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.throttling import WARM_CACHE_HEADER, warm_cache_header
+from foodgram_backend.constants import (WARM_CACHE_CONCURRENCY,
+                                        WARM_CACHE_LOG_URLS,
+                                        WARM_CACHE_TIMEOUT,
+                                        WARM_CACHE_TOP_RECIPES)
+from recipes.models import Recipe
+
+# Успешный GET к API в журнале nginx (формат combined).
+LOG_REQUEST = re.compile(r'"GET (/api/\S*) HTTP/[\d.]+" 200 ')
+
+
+def urls_from_log(path, limit):
+    """Самые частые успешные GET-запросы к API из журнала доступа."""
+    counter = Counter()
+    try:
+        with open(path, encoding='utf-8', errors='replace') as log:
+            for line in log:
+                match = LOG_REQUEST.search(line)
+                if match:
+                    counter[match.group(1)] += 1
+    except OSError as error:
+        raise CommandError(f'Не удалось прочитать журнал: {error}')
+    return [url for url, _ in counter.most_common(limit)]
+
+
+def top_recipe_urls(limit):
+    return [
+        f'/api/recipes/{recipe_id}/' for recipe_id in
+        Recipe.objects.order_by('-popularity', '-pub_date').values_list(
+            'id', flat=True
+        )[:limit]
+    ]
+
+
+def fetch(url, base_url, host):
+    """Выполняет анонимный GET к запущенному бэкенду.
+
+    Подписанный заголовок X-Warm-Cache выводит запрос из-под лимитов
+    анонимных посетителей.
+    """
+    started = perf_counter()
+    try:
+        status_code = requests.get(
+            base_url + url,
+            headers={'Host': host, WARM_CACHE_HEADER: warm_cache_header()},
+            timeout=WARM_CACHE_TIMEOUT,
+        ).status_code
+    except requests.RequestException as error:
+        status_code = type(error).__name__
+    return url, status_code, perf_counter() - started
+
+
+class Command(BaseCommand):
+    """Команда прогрева после деплоя или сброса кэша."""
+    help = (
+        'Выполняет частые анонимные запросы к запущенному бэкенду по HTTP, '
+        'чтобы первые посетители не ждали холодных запросов. Адреса '
+        'берутся из аргументов, журнала доступа nginx или настройки '
+        'WARM_CACHE_URLS; к ним добавляются самые популярные рецепты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*',
+            help='Адреса для прогрева (по умолчанию WARM_CACHE_URLS)'
+        )
+        parser.add_argument(
+            '--base-url', default=settings.WARM_CACHE_BASE_URL,
+            help='Адрес запущенного бэкенда (по умолчанию WARM_CACHE_BASE_URL)'
+        )
+        parser.add_argument(
+            '--access-log',
+            help='Журнал доступа nginx, из которого берутся частые адреса'
+        )
+        parser.add_argument(
+            '--log-urls', type=int, default=WARM_CACHE_LOG_URLS,
+            help='Количество адресов, берущихся из журнала'
+        )
+        parser.add_argument(
+            '--top-recipes', type=int, default=WARM_CACHE_TOP_RECIPES,
+            help='Количество самых популярных рецептов для прогрева'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=WARM_CACHE_CONCURRENCY,
+            help='Количество одновременных запросов'
+        )
+
+    def get_urls(self, options):
+        if options['urls']:
+            urls = options['urls']
+        elif options['access_log']:
+            urls = urls_from_log(options['access_log'], options['log_urls'])
+        else:
+            urls = list(settings.WARM_CACHE_URLS)
+        urls += top_recipe_urls(options['top_recipes'])
+        return list(dict.fromkeys(urls))
+
+    def handle(self, *args, **options):
+        urls = self.get_urls(options)
+        base_url = options['base_url'].rstrip('/')
+        # Запросы идут в обход nginx, поэтому Host подставляется явно.
+        host = next(
+            (
+                host.lstrip('.') for host in settings.ALLOWED_HOSTS
+                if host and host != '*'
+            ),
+            'localhost',
+        )
+        started = perf_counter()
+        with ThreadPoolExecutor(max(options['concurrency'], 1)) as executor:
+            results = list(executor.map(
+                lambda url: fetch(url, base_url, host), urls
+            ))
+        failed = 0
+        for url, status_code, seconds in results:
+            line = f'{status_code} {seconds * 1000:8.1f} мс  {url}'
+            if status_code == 200:
+                self.stdout.write(line)
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(line))
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето адресов: {len(results) - failed} из {len(results)} '
+            f'за {perf_counter() - started:.2f} с'
+        ))
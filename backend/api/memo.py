@@ -0,0 +1,45 @@
+MEMO_CONTEXT_KEY = 'serialization_memo'
+
+
+def serialization_memo(context):
+    """Мемо сериализации, общий для всех сериализаторов запроса.
+
+    Хранится в контексте корневого сериализатора, который вложенные
+    сериализаторы разделяют с ним, и живёт столько же, сколько запрос.
+    """
+    return context.setdefault(MEMO_CONTEXT_KEY, {})
+
+
+def remember(context, key, build):
+    """Значение ``build()`` по ключу, вычисленное один раз за запрос."""
+    memo = serialization_memo(context)
+    if key not in memo:
+        memo[key] = build()
+    return memo[key]
+
+
+class MemoizedRepresentationMixin:
+    """Сериализует каждый объект один раз за запрос.
+
+    Одни и те же автор и теги встречаются во многих рецептах страницы.
+    Готовое представление объекта запоминается по классу сериализатора,
+    набору его полей и ключу объекта и переиспользуется, а не собирается
+    заново.
+    """
+
+    def memo_key(self, instance):
+        return instance.pk
+
+    def to_representation(self, instance):
+        key = self.memo_key(instance)
+        if key is None:
+            return super().to_representation(instance)
+        if not hasattr(self, '_memo_prefix'):
+            self._memo_prefix = (type(self), tuple(self.fields))
+        return remember(
+            self.context,
+            (*self._memo_prefix, key),
+            lambda: super(
+                MemoizedRepresentationMixin, self
+            ).to_representation(instance),
+        )
@@ -1,8 +1,73 @@
-from rest_framework.pagination import PageNumberPagination
+from datetime import datetime
 
-from foodgram_backend.constants import PAGE_SIZE
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+
+from foodgram_backend.constants import MAX_PAGE_SIZE, PAGE_SIZE
+from recipes.feed import feed_keys
 
 
 class LimitPagination(PageNumberPagination):
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class FeedPagination(CursorPagination):
+    """Keyset-пагинация ленты подписок по дате публикации.
+
+    Страница строится по ключам (pub_date, id рецепта) из
+    ``feed_keys``, курсор хранит ключ крайнего рецепта страницы.
+    """
+
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+    ordering = ('-pub_date', '-id')
+
+    def paginate_feed(self, request, user):
+        """Возвращает id рецептов страницы ленты пользователя."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor.reverse
+        keys = feed_keys(
+            user.id,
+            self.decode_position(cursor),
+            reverse,
+            self.page_size + 1,
+        )
+        has_more = len(keys) > self.page_size
+        self.keys = keys[:self.page_size]
+        if reverse:
+            self.keys.reverse()
+        self.has_next = reverse or has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        return [recipe_id for _, recipe_id in self.keys]
+
+    def decode_position(self, cursor):
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            pub_date, recipe_id = cursor.position.rsplit('_', 1)
+            return datetime.fromisoformat(pub_date), int(recipe_id)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_position(self, key, reverse):
+        pub_date, recipe_id = key
+        return self.encode_cursor(
+            Cursor(0, reverse, f'{pub_date.isoformat()}_{recipe_id}')
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.keys:
+            return None
+        return self.encode_position(self.keys[-1], False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.keys:
+            return None
+        return self.encode_position(self.keys[0], True)
@@ -0,0 +1,62 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с откатом на стандартный json.
+
+    Типы, которые orjson не знает (ленивые строки перевода, Decimal,
+    QuerySet), и даты приводятся тем же JSONEncoder, что и в DRF.
+    U+2028 и U+2029 экранируются, как в DRF, чтобы ответ можно было
+    встроить в JavaScript. ReturnDict и ReturnList сериализуются как
+    обычные dict и list. В отличие от DRF, NaN и бесконечности
+    выводятся как null, а не вызывают ошибку.
+    """
+
+    encoder = JSONEncoder()
+    escapes = (
+        ('\u2028'.encode(), b'\\u2028'),
+        ('\u2029'.encode(), b'\\u2029'),
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        content = orjson.dumps(
+            data,
+            default=self.encoder.default,
+            option=(
+                orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            ),
+        )
+        for character, escape in self.escapes:
+            if character in content:
+                content = content.replace(character, escape)
+        return content
+
+
+class FastJSONParser(JSONParser):
+    """JSON-парсер на orjson с откатом на стандартный json."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
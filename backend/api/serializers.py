@@ -2,11 +2,33 @@ from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from api.memo import MemoizedRepresentationMixin, remember
+from api.sparse import SparseFieldsetMixin
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
+from recipes.registry import cached_object, lookup
+from recipes.shopping_list import recipe_amounts
+from recipes.signals import recipe_composition_changed
+from tasks.models import Task
 from users.serializers import CustomUserProfileSerializer
 
 
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Id тега или ингредиента, проверяемый по реестру без запроса."""
+
+    def to_internal_value(self, data):
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = lookup(self.queryset.model, [pk]).get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
 class IngredientSerializer(serializers.ModelSerializer):
     """Сериализатор ингредиентов."""
 
@@ -15,13 +37,19 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(MemoizedRepresentationMixin, serializers.ModelSerializer):
     """Сериализатор тэгов."""
 
     class Meta:
         model = Tag
         fields = ('id', 'name', 'slug')
 
+    def to_representation(self, instance):
+        # В рецептах теги загружаются только с id, остальное — из реестра.
+        return super().to_representation(
+            cached_object(Tag, instance.pk) or instance
+        )
+
 
 class IngredientGetRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для ингридиентов в рецепте"""
@@ -36,8 +64,29 @@ class IngredientGetRecipeSerializer(serializers.ModelSerializer):
         model = RecipeIngredient
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
+    def to_representation(self, instance):
+        # Ингредиент сериализуется один раз за запрос по id из строки,
+        # название и единица берутся из реестра без загрузки из базы.
+        ingredient = remember(
+            self.context,
+            (Ingredient, instance.ingredient_id),
+            lambda: self.ingredient_data(
+                cached_object(Ingredient, instance.ingredient_id)
+                or instance.ingredient
+            ),
+        )
+        return {**ingredient, 'amount': instance.amount}
+
+    @staticmethod
+    def ingredient_data(ingredient):
+        return {
+            'id': ingredient.id,
+            'name': ingredient.name,
+            'measurement_unit': ingredient.measurement_unit,
+        }
+
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор для рецептов."""
 
     tags = TagSerializer(many=True)
@@ -65,7 +114,24 @@ class RecipeSerializer(serializers.ModelSerializer):
             'cooking_time',
         )
 
+    collapsed_fields = {
+        'author': lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+        'tags': lambda: serializers.PrimaryKeyRelatedField(
+            many=True, read_only=True
+        ),
+        'ingredients': lambda: RecipeIngredientSerializer(
+            many=True, source='recipe_ingredients', read_only=True
+        ),
+    }
+
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         return (
             request
@@ -74,6 +140,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context['request'].user
         return (
             user.is_authenticated
@@ -84,7 +152,7 @@ class RecipeSerializer(serializers.ModelSerializer):
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор для коротного ингредиента для рецепта."""
 
-    id = serializers.PrimaryKeyRelatedField(
+    id = ReferencePrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(), source='ingredient'
     )
 
@@ -96,7 +164,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
     """Сериализатор страницы рецепта."""
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = ReferencePrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True
     )
     ingredients = RecipeIngredientSerializer(many=True)
@@ -166,12 +234,18 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         validated_data['author'] = self.context['request'].user
         recipe = super().create(validated_data)
         self.add_tags_ingredients(recipe, tags_data, ingredients_data)
+        recipe_composition_changed.send(
+            sender=Recipe, recipe=recipe, previous_amounts={}
+        )
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
+        previous_amounts = None
+        if ingredients is not None:
+            previous_amounts = recipe_amounts(instance.id)
         instance = super().update(instance, validated_data)
         if tags is not None:
             instance.tags.clear()
@@ -179,6 +253,12 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         if ingredients is not None:
             instance.ingredients.clear()
             self.add_tags_ingredients(instance, [], ingredients)
+        if tags is not None or ingredients is not None:
+            recipe_composition_changed.send(
+                sender=Recipe,
+                recipe=instance,
+                previous_amounts=previous_amounts,
+            )
         return instance
 
 
@@ -200,6 +280,10 @@ class RecipeBaseSerializer(serializers.ModelSerializer):
         fields = ('user', 'recipe')
         read_only_fields = ('user',)
 
+    def get_validators(self):
+        # Повтор проверяет validate() с понятным пользователю сообщением.
+        return []
+
     def validate(self, attrib):
         recipe = attrib['recipe']
         user = self.context['request'].user
@@ -233,3 +317,11 @@ class ShoppingCartSerializer(RecipeBaseSerializer):
     class Meta:
         model = ShoppingCart
         fields = '__all__'
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    """Сериализатор статуса фоновой задачи."""
+
+    class Meta:
+        model = Task
+        fields = ('id', 'name', 'status', 'attempts', 'error', 'created_at')
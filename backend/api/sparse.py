@@ -0,0 +1,69 @@
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _query_set(request, param):
+    if request is None or param not in request.query_params:
+        return None
+    return {
+        name.strip()
+        for name in request.query_params[param].split(',')
+        if name.strip()
+    }
+
+
+def requested_fields(request):
+    """Поля из ?fields=, None если параметр не передан."""
+    return _query_set(request, FIELDS_PARAM)
+
+
+def requested_expand(request):
+    """Связи из ?expand=, которые нужно вернуть вложенными объектами."""
+    return _query_set(request, EXPAND_PARAM) or set()
+
+
+def sparse_fieldset(request, all_fields, relations=()):
+    """Возвращает (поля ответа, развёрнутые связи) для запроса.
+
+    Без ?fields= ответ полный и все связи развёрнуты. С ?fields= связи
+    сворачиваются до id, если они не перечислены в ?expand=.
+    """
+    fields = requested_fields(request)
+    if fields is None:
+        return set(all_fields), set(relations)
+    fields &= set(all_fields)
+    return fields, fields & set(relations) & requested_expand(request)
+
+
+class SparseFieldsetMixin:
+    """Оставляет в ответе корневого сериализатора только поля из ?fields=.
+
+    Связи из ``collapsed_fields`` без ?expand= заменяются компактным
+    представлением. Вложенные сериализаторы не затрагиваются.
+    """
+
+    collapsed_fields = {}
+
+    def _is_root(self):
+        return self.parent is None or (
+            isinstance(self.parent, ListSerializer)
+            and self.parent.parent is None
+        )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        names, expanded = sparse_fieldset(
+            self.context.get('request'), fields, self.collapsed_fields
+        )
+        if names == set(fields) and expanded == set(self.collapsed_fields):
+            return fields
+        for name in list(fields):
+            if name not in names:
+                del fields[name]
+            elif name in self.collapsed_fields and name not in expanded:
+                fields[name] = self.collapsed_fields[name]()
+        return fields
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+
+from api.utils import render_shopping_list_pdf, shopping_list_filename
+from recipes.shopping_list import build_shopping_list
+from tasks.queue import task
+
+User = get_user_model()
+
+
+@task('shopping_list_pdf')
+def shopping_list_pdf(user_id):
+    """Формирует PDF со списком покупок пользователя.
+
+    Список собирается заново: задача ставится сразу после изменения
+    корзины, и кэш может отставать.
+    """
+    user = User.objects.get(id=user_id)
+    return (
+        shopping_list_filename(user),
+        render_shopping_list_pdf(build_shopping_list(user_id)),
+    )
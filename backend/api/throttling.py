@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from time import monotonic, time
+
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from foodgram_backend.constants import (SHED_MAX_CONCURRENCY,
+                                        SHED_MAX_QUEUE_DELAY, SHED_RETRY_AFTER,
+                                        SHED_TARGET_LATENCY,
+                                        THROTTLE_MAX_BUCKETS,
+                                        WARM_CACHE_SIGNATURE_TTL)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+WARM_CACHE_HEADER = 'X-Warm-Cache'
+
+
+def _warm_cache_signature(timestamp):
+    return salted_hmac('api.throttling.warm_cache', timestamp).hexdigest()
+
+
+def warm_cache_header():
+    """Значение заголовка X-Warm-Cache для запросов команды warm_cache.
+
+    Метка времени подписана SECRET_KEY, поэтому подделать заголовок
+    без ключа нельзя, а перехваченный действует
+    WARM_CACHE_SIGNATURE_TTL секунд.
+    """
+    timestamp = str(int(time()))
+    return f'{timestamp}:{_warm_cache_signature(timestamp)}'
+
+
+def is_warm_cache_request(request):
+    timestamp, _, signature = request.META.get(
+        'HTTP_X_WARM_CACHE', ''
+    ).partition(':')
+    try:
+        fresh = abs(time() - int(timestamp)) <= WARM_CACHE_SIGNATURE_TTL
+    except ValueError:
+        return False
+    return fresh and constant_time_compare(
+        signature, _warm_cache_signature(timestamp)
+    )
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Троттлинг по алгоритму token bucket в памяти процесса.
+
+    Лимит задаётся в DEFAULT_THROTTLE_RATES как '<число>/<период>':
+    число — ёмкость корзины (допустимый всплеск), токены восполняются
+    равномерно за период. Корзины живут в памяти воркера, число
+    хранимых корзин ограничено THROTTLE_MAX_BUCKETS. Подписанные
+    запросы команды warm_cache лимитами не ограничиваются.
+    """
+
+    scope = None
+    buckets = None
+    lock = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.buckets = OrderedDict()
+        cls.lock = Lock()
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError
+
+    def parse_rate(self, rate):
+        number, period = rate.split('/')
+        return int(number), PERIODS[period[0]]
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        key = rate and self.get_ident_key(request, view)
+        if not key or is_warm_cache_request(request):
+            return True
+        capacity, period = self.parse_rate(rate)
+        refill = capacity / period
+        now = monotonic()
+        key = f'{scope}:{key}'
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > THROTTLE_MAX_BUCKETS:
+                self.buckets.popitem(last=False)
+        self.wait_time = None if allowed else (1 - tokens) / refill
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    """Лимит запросов для аутентифицированного пользователя."""
+
+    scope = 'user'
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class AnonRateThrottle(TokenBucketThrottle):
+    """Лимит запросов для анонимного клиента по IP-адресу."""
+
+    scope = 'anon'
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class ScopedRateThrottle(TokenBucketThrottle):
+    """Лимит запросов к классу эндпоинтов по ``throttle_scope`` view."""
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return self.get_ident(request)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Адаптивный ограничитель одновременных тяжёлых запросов (AIMD).
+
+    Лимит растёт на единицу, пока запросы укладываются в целевое время,
+    и уменьшается вдвое, когда время ответа превышает цель.
+    """
+
+    def __init__(self, max_limit=SHED_MAX_CONCURRENCY,
+                 target_latency=SHED_TARGET_LATENCY):
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.limit = max_limit
+        self.in_flight = 0
+        self.lock = Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency):
+        with self.lock:
+            self.in_flight -= 1
+            if latency > self.target_latency:
+                self.limit = max(1, self.limit // 2)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1)
+
+
+def queue_delay(request):
+    """Время ожидания запроса в очереди по заголовку X-Request-Start.
+
+    Заголовок выставляет nginx в формате 't=<секунды с мс>'.
+    """
+    header = request.META.get('HTTP_X_REQUEST_START', '')
+    try:
+        return max(0, time() - float(header.replace('t=', '')))
+    except ValueError:
+        return 0
+
+
+def shed_load(func):
+    """Отвечает 503 с Retry-After вместо выполнения тяжёлого запроса.
+
+    Запрос отклоняется, если он слишком долго ждал в очереди или
+    исчерпан адаптивный лимит одновременных запросов этого эндпоинта.
+    """
+    limiter = AdaptiveConcurrencyLimiter()
+
+    @wraps(func)
+    def wrapper(self, request, *args, **kwargs):
+        if (
+            queue_delay(request) > SHED_MAX_QUEUE_DELAY
+            or not limiter.acquire()
+        ):
+            return Response(
+                'Сервер перегружен, повторите запрос позже.',
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(SHED_RETRY_AFTER)},
+            )
+        started = monotonic()
+        try:
+            return func(self, request, *args, **kwargs)
+        finally:
+            limiter.release(monotonic() - started)
+
+    wrapper.limiter = limiter
+    return wrapper
@@ -1,7 +1,9 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet
+from api.batch import batch
+from api.events import recipe_events
+from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, TaskViewSet
 from users.views import UserViewSet
 
 router_v1 = routers.DefaultRouter()
@@ -12,6 +14,7 @@ router_v1.register(
 )
 router_v1.register('tags', TagViewSet, basename='tags')
 router_v1.register('recipes', RecipeViewSet, basename='recipes')
+router_v1.register('tasks', TaskViewSet, basename='tasks')
 
 
 urlpatterns = [
@@ -19,6 +22,8 @@ urlpatterns = [
         'recipes/<int:id>/get-link/',
         RecipeViewSet.as_view({'get': 'get_link'}), name='recipe-get-link'
     ),
+    path('batch/', batch, name='batch'),
+    path('events/recipes/', recipe_events, name='recipe-events'),
     path('', include(router_v1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
@@ -2,16 +2,19 @@ import os
 from io import BytesIO
 
 from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 
 
-def create_shopping_list_pdf(user, ingredients):
-    filename = f'{user.username}_shopping_list.pdf'
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+def shopping_list_filename(user):
+    return f'{user.username}_shopping_list.pdf'
+
+
+def render_shopping_list_pdf(shopping_list):
+    """Возвращает PDF со списком покупок в виде байтов."""
+    # reportlab тянет за собой Pillow, поэтому загружается при первом PDF.
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
 
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=letter)
@@ -24,13 +27,13 @@ def create_shopping_list_pdf(user, ingredients):
     p.drawString(100, 750, 'Список покупок')
     y = 700
 
-    for ingredient in ingredients:
+    for item in shopping_list:
         p.drawString(
             100,
             y,
-            f'- {ingredient["ingredient__name"]} '
-            f'({ingredient["ingredient__measurement_unit"]}) '
-            f'- {ingredient["amount"]}'
+            f'- {item["name"]} '
+            f'({item["measurement_unit"]}) '
+            f'- {item["amount"]}'
         )
         y -= 20
         if y < 40:
@@ -41,6 +44,16 @@ def create_shopping_list_pdf(user, ingredients):
     p.showPage()
     p.save()
 
-    buffer.seek(0)
-    response.write(buffer.read())
+    return buffer.getvalue()
+
+
+def file_response(filename, content, content_type='application/pdf'):
+    response = HttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
+
+
+def create_shopping_list_pdf(user, shopping_list):
+    return file_response(
+        shopping_list_filename(user), render_shopping_list_pdf(shopping_list)
+    )
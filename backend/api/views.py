@@ -1,20 +1,34 @@
 import base62
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch, Sum
+from django.http import FileResponse, Http404, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
-from rest_framework.decorators import action, api_view
-from rest_framework.permissions import SAFE_METHODS, AllowAny
+from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from api.conditional import (conditional_response, get_validators,
+                             set_validators)
 from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import LimitPagination
+from api.pagination import FeedPagination, LimitPagination
 from api.permissions import IsAuthorAdminOrReadOnly
 from api.serializers import (FavoritesSerializer, IngredientSerializer,
-                             RecipeCreateUpdateSerializer, RecipeIngredient,
-                             RecipeSerializer, ShoppingCartSerializer,
-                             TagSerializer)
-from recipes.models import Ingredient, Recipe, Tag
+                             RecipeCreateUpdateSerializer, RecipeSerializer,
+                             RecipeShortSerializer, ShoppingCartSerializer,
+                             TagSerializer, TaskSerializer)
+from api.sparse import sparse_fieldset
+from api.throttling import shed_load
+from foodgram_backend.constants import SHORT_LINK_MAX_AGE
+from recipes.cache import recipe_exists
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from recipes.shopping_list import get_shopping_list
+from tasks.models import Task
+from tasks.queue import enqueue
+from users.serializers import USER_COLUMNS, subscription_exists
 
 from .utils import create_shopping_list_pdf
 
@@ -47,12 +61,97 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filterset_class = RecipeFilter
     pagination_class = LimitPagination
     permission_classes = (IsAuthorAdminOrReadOnly,)
+    throttle_scope = None
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeSerializer
         return RecipeCreateUpdateSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return self.shape_queryset(queryset)
+
+    def shape_queryset(self, queryset):
+        """Подгоняет запрос под поля ответа из ?fields= и ?expand=.
+
+        Загружаются только нужные столбцы, автор подгружается целиком
+        лишь для развёрнутого поля, у тегов и ингредиентов читаются только
+        id. Флаги избранного, корзины и подписки на автора вычисляются
+        подзапросами для всей страницы.
+        """
+        user = self.request.user
+        fields, expanded = sparse_fieldset(
+            self.request,
+            RecipeSerializer.Meta.fields,
+            RecipeSerializer.collapsed_fields,
+        )
+        columns = {'id', 'pub_date'} | (
+            fields & {'name', 'image', 'text', 'cooking_time'}
+        )
+        if 'author' in expanded:
+            queryset = queryset.select_related('author').annotate(
+                author_is_subscribed=subscription_exists(user, 'author')
+            )
+            columns |= {f'author__{name}' for name in USER_COLUMNS}
+        elif 'author' in fields:
+            columns.add('author')
+        queryset = queryset.only(*columns)
+        if 'tags' in fields:
+            # Названия тегов и ингредиентов берутся из реестра в памяти.
+            queryset = queryset.prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only('id'))
+            )
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related('recipe_ingredients')
+        for name, model in (
+            ('is_favorited', Favorite),
+            ('is_in_shopping_cart', ShoppingCart),
+        ):
+            if name in fields:
+                queryset = queryset.annotate(**{name: Exists(
+                    model.objects.filter(user=user.id, recipe=OuterRef('pk'))
+                )})
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """Список рецептов с поддержкой условных запросов.
+
+        Список проверяется только по ETag. Удаление рецепта не меняет
+        наибольшую дату изменения, поэтому Last-Modified по ней
+        подтверждал бы устаревший список.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        aggregates = [Max('updated_at'), Count('id')]
+        if 'ordering' in request.query_params:
+            # Оценки популярности меняются без изменения рецептов.
+            aggregates += [Sum('popularity'), Sum('trending')]
+        etag, last_modified = get_validators(
+            request, *queryset.aggregate(*aggregates).values()
+        )
+        return conditional_response(request, etag, last_modified) or (
+            set_validators(
+                super().list(request, *args, **kwargs), etag, last_modified
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт с поддержкой условных запросов."""
+        updated_at = get_object_or_404(
+            self.get_queryset().values_list('updated_at', flat=True),
+            pk=kwargs['pk']
+        )
+        etag, last_modified = get_validators(request, last_modified=updated_at)
+        return conditional_response(request, etag, last_modified) or (
+            set_validators(
+                super().retrieve(request, *args, **kwargs),
+                etag,
+                last_modified
+            )
+        )
+
     def add_recipe(self, request, pk, serializer_class):
         """Добавление рецепта в избранное или в корзину покупок."""
         recipe = get_object_or_404(self.queryset, pk=pk)
@@ -61,7 +160,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
             context={'request': request}
         )
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                # Параллельный запрос успел добавить рецепт раньше.
+                return Response(
+                    {'non_field_errors': [
+                        f'Рецепт уже добавлен в {serializer_class.related}'
+                    ]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -98,17 +207,57 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Удаление рецепта из корзины покупок."""
         return self.delete_recipe(request, pk, 'shopping_cart')
 
-    @action(detail=False, methods=['get'], url_path='download_shopping_cart')
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='download_shopping_cart',
+        permission_classes=(IsAuthenticated,),
+        throttle_scope='shopping_list',
+    )
+    @shed_load
     def download_shopping_cart(self, request):
         user = request.user
-        ingredients = (
-            RecipeIngredient.objects.filter(recipe__shopping_cart__user=user)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(amount=Sum('amount'))
+        if request.query_params.get('async') in ('1', 'true'):
+            task = enqueue('shopping_list_pdf', owner=user, user_id=user.id)
+            return Response(
+                TaskSerializer(task).data, status=status.HTTP_202_ACCEPTED
+            )
+        return create_shopping_list_pdf(user, get_shopping_list(user))
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        recipe_ids = self.paginator.paginate_feed(request, request.user)
+        recipes = self.shape_queryset(
+            Recipe.objects.filter(id__in=recipe_ids)
+        ).in_bulk()
+        recipes = [
+            recipes[recipe_id] for recipe_id in recipe_ids
+            if recipe_id in recipes
+        ]
+        serializer = RecipeSerializer(
+            recipes, many=True, context={'request': request}
         )
+        return self.get_paginated_response(serializer.data)
 
-        response = create_shopping_list_pdf(user, ingredients)
-        return response
+    @action(detail=True, methods=['get'], permission_classes=(AllowAny,))
+    def similar(self, request, pk):
+        """Рецепты с наибольшим числом общих ингредиентов и тегов."""
+        recipe = get_object_or_404(Recipe, id=pk)
+        serializer = RecipeShortSerializer(
+            [
+                item.similar for item in
+                recipe.similar_recipes.select_related('similar')
+            ],
+            many=True,
+            context={'request': request}
+        )
+        return Response(serializer.data)
 
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_link(self, request, id=None):
@@ -118,19 +267,54 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'ID рецепта не указан.',
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if not recipe_exists(int(id)):
+            raise Http404('Рецепт не найден.')
         short_id = base62.encode(int(id))
         short_link = request.build_absolute_uri(f'/s/{short_id}')
         return Response({'short-link': short_link}, status=status.HTTP_200_OK)
 
 
-@api_view(['GET'])
+class TaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet для статуса и результатов фоновых задач пользователя."""
+
+    serializer_class = TaskSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = LimitPagination
+
+    def get_queryset(self):
+        return Task.objects.filter(owner=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk):
+        """Скачивание результата выполненной задачи."""
+        task = self.get_object()
+        if task.status != Task.DONE or not task.result:
+            return Response(
+                'Результат задачи ещё не готов.',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return FileResponse(
+            task.result.open('rb'),
+            as_attachment=True,
+            filename=task.result_name or None,
+        )
+
+
+@require_GET
 def redirect_short_link(request, short_id):
-    """Перенаправляет короткую ссылку на страницу рецепта."""
+    """Перенаправляет короткую ссылку на страницу рецепта.
+
+    Обычное представление Django без стека DRF: существование рецепта
+    проверяется по снимку id, ответ можно кэшировать на стороне nginx.
+    Срок кэширования короткий: ссылка на удалённый рецепт перестаёт
+    перенаправлять вскоре после удаления.
+    """
     try:
         recipe_id = base62.decode(short_id)
-        return redirect(f'/recipes/{recipe_id}/')
     except ValueError:
-        return Response(
-            "Некорректная короткая ссылка.",
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        return HttpResponseBadRequest('Некорректная короткая ссылка.')
+    if not recipe_exists(recipe_id):
+        raise Http404('Рецепт не найден.')
+    response = redirect(f'/recipes/{recipe_id}/')
+    patch_cache_control(response, public=True, max_age=SHORT_LINK_MAX_AGE)
+    return response
@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    """Передаёт обработчикам канал ``receive`` в ``scope``.
+
+    Django 4.2 перестаёт читать канал после тела запроса и не замечает
+    отключения клиента во время потоковой передачи ответа. Потоки
+    событий слушают по этому каналу сообщение http.disconnect.
+    """
+    if scope['type'] == 'http':
+        scope = {**scope, 'receive': receive}
+    await django_application(scope, receive, send)
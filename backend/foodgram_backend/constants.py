@@ -8,3 +8,57 @@ MIN_TIME = MIN_AMOUNT = 1
 MAX_TIME = MAX_AMOUNT = 32000
 
 PAGE_SIZE = 16
+
+SNAPSHOT_TIMEOUT = 5 * 60
+SHORT_LINK_MAX_AGE = 60
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+FEED_BATCH_SIZE = 1000
+SIMILAR_RECIPES_COUNT = 10
+SIMILAR_BATCH_SIZE = 1000
+SIMILAR_MAX_CANDIDATES = 2000
+CAN_COOK_MAX_MISSING = 3
+CAN_COOK_MAX_RESULTS = 1000
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60
+MEDIA_NAME_LENGTH = 100
+TASK_NAME_LENGTH = 64
+TASK_STATUS_LENGTH = 16
+TASK_CONCURRENCY = 2
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_DELAY = 10
+TASK_POLL_INTERVAL = 1
+TASK_LOCK_TIMEOUT = 10 * 60
+TASK_RESULT_TTL = 24 * 60 * 60
+TASK_PRUNE_INTERVAL = 60 * 60
+ADMIN_COUNT_LIMIT = 10000
+MAX_PAGE_SIZE = 100
+THROTTLE_MAX_BUCKETS = 10000
+SHED_MAX_CONCURRENCY = 4
+SHED_TARGET_LATENCY = 2
+SHED_MAX_QUEUE_DELAY = 1
+SHED_RETRY_AFTER = 5
+REPLICA_PIN_SECONDS = 10
+INGREDIENT_SEARCH_LIMIT = 50
+TRIGRAM_MIN_QUERY_LENGTH = 3
+TRIGRAM_SIMILARITY_THRESHOLD = 0.3
+BATCH_MAX_REQUESTS = 10
+BATCH_CONCURRENCY = 4
+POPULAR_WINDOW_DAYS = 30
+TRENDING_WINDOW_DAYS = 7
+TRENDING_HALF_LIFE_HOURS = 24
+FAVORITE_SCORE_WEIGHT = 2
+CART_SCORE_WEIGHT = 1
+SCORE_BATCH_SIZE = 1000
+CART_BATCH_SIZE = 1000
+CART_SYNC_MAX_USERS = 100
+TRANSFER_BATCH_SIZE = 500
+WARM_CACHE_CONCURRENCY = 4
+WARM_CACHE_TOP_RECIPES = 20
+WARM_CACHE_LOG_URLS = 50
+WARM_CACHE_TIMEOUT = 30
+WARM_CACHE_SIGNATURE_TTL = 60
+SSE_MAX_CONNECTIONS = 1000
+SSE_MAX_USER_CONNECTIONS = 3
+SSE_QUEUE_SIZE = 16
+SSE_HEARTBEAT_INTERVAL = 20
+SSE_CONNECTION_TIMEOUT = 10 * 60
+SSE_RETRY = 5
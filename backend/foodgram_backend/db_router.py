@@ -0,0 +1,55 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+use_primary = ContextVar('use_primary', default=False)
+# Событие текущего запроса, отмечающее запись в основную базу.
+primary_write = ContextVar('primary_write', default=None)
+
+
+@contextmanager
+def pin_primary():
+    """Направляет все чтения внутри блока в основную базу."""
+    token = use_primary.set(True)
+    try:
+        yield
+    finally:
+        use_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Роутер чтения с реплик и записи в основную базу.
+
+    Чтение уходит в одну из реплик из ``REPLICA_DATABASES``, кроме
+    случаев, когда запрос закреплён за основной базой, уже писал в неё
+    или открыта транзакция: тогда видны собственные только что
+    записанные данные. Запись отмечается в событии ``primary_write``,
+    по нему middleware закрепляет клиента за основной базой.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        written = primary_write.get()
+        if (
+            not replicas
+            or use_primary.get()
+            or written is not None and written.is_set()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        written = primary_write.get()
+        if written is not None:
+            written.set()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,43 @@
+from threading import Event
+
+from foodgram_backend.constants import REPLICA_PIN_SECONDS
+from foodgram_backend.db_router import primary_write, use_primary
+
+PRIMARY_COOKIE = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadYourWritesMiddleware:
+    """Закрепляет клиента за основной базой после записи.
+
+    Изменяющие запросы целиком работают с основной базой. Cookie на
+    REPLICA_PIN_SECONDS ставится, если запрос действительно записал
+    что-то в основную базу, независимо от метода: так GET, ставящий
+    задачу в очередь, тоже закрепляет клиента. Пока cookie жива, чтения
+    клиента идут в основную базу, и отставание реплик не прячет его
+    изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        written = Event()
+        tokens = (
+            use_primary.set(
+                request.method not in SAFE_METHODS
+                or PRIMARY_COOKIE in request.COOKIES
+            ),
+            primary_write.set(written),
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(tokens[0])
+            primary_write.reset(tokens[1])
+        if written.is_set():
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,29 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from foodgram_backend.constants import ADMIN_COUNT_LIMIT
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки без полного COUNT(*) по большим таблицам.
+
+    Для нефильтрованного списка в PostgreSQL берётся оценка числа строк
+    из статистики, в остальных случаях строки считаются не дальше
+    ADMIN_COUNT_LIMIT.
+    """
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if connection.vendor == 'postgresql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [self.object_list.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] > ADMIN_COUNT_LIMIT:
+                return int(row[0])
+        return self.object_list.order_by()[:ADMIN_COUNT_LIMIT].count()
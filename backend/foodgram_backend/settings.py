@@ -1,9 +1,12 @@
 import os
+import tempfile
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
 from dotenv import load_dotenv
 
+from foodgram_backend.constants import TRIGRAM_SIMILARITY_THRESHOLD
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -37,21 +40,26 @@ INSTALLED_APPS = [
     'djoser',
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
+    'tasks.apps.TasksConfig',
     'api',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram_backend.middleware.ReadYourWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    # Панель отладки нужна только при разработке.
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'foodgram_backend.urls'
 
 TEMPLATES = [
@@ -82,8 +90,22 @@ if os.environ.get('DJANGO_SERVER_TYPE') == 'production':
             'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
             'HOST': os.environ.get('DB_HOST', ''),
             'PORT': os.environ.get('DB_PORT', 5432),
+            'OPTIONS': {
+                'options': (
+                    '-c pg_trgm.word_similarity_threshold='
+                    f'{TRIGRAM_SIMILARITY_THRESHOLD}'
+                ),
+            },
         }
     }
+    INSTALLED_APPS.append('django.contrib.postgres')
+    replica_hosts = os.getenv('DB_REPLICA_HOSTS', '').replace(' ', '')
+    for number, host in enumerate(filter(None, replica_hosts.split(','))):
+        DATABASES[f'replica_{number}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
 
     DATABASES = {
@@ -92,6 +114,33 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    if os.getenv('DB_REPLICA_NAME'):
+        DATABASES['replica_0'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / os.getenv('DB_REPLICA_NAME'),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['foodgram_backend.db_router.PrimaryReplicaRouter']
+
+# Кэш общий для всех процессов: веб-воркеров, run_tasks и команд.
+# Через него процессы узнают о новых версиях снимков в памяти.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(tempfile.gettempdir(), 'foodgram-cache'),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -127,6 +176,15 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'foodgram_backend.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 AUTH_USER_MODEL = 'users.CustomUser'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -139,8 +197,46 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.UserRateThrottle',
+        'api.throttling.AnonRateThrottle',
+        'api.throttling.ScopedRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '120/minute',
+        'anon': '60/minute',
+        'shopping_list': '10/minute',
+    },
 }
 
+# Шина событий для потока /api/events/recipes/. Локальная шина работает
+# в пределах одного процесса, поэтому бэкенд запускается одним воркером.
+EVENT_BUS = 'recipes.events.LocalEventBus'
+
+# Адрес бэкенда, к которому команда warm_cache обращается по HTTP: кэши
+# в памяти заполняются только в процессах, которые обслуживают запросы.
+WARM_CACHE_BASE_URL = os.getenv(
+    'WARM_CACHE_BASE_URL', 'http://localhost:8000'
+)
+
+# Адреса, которые команда warm_cache прогревает после деплоя.
+WARM_CACHE_URLS = [
+    '/api/tags/',
+    '/api/ingredients/',
+    '/api/recipes/',
+    '/api/recipes/?ordering=popular',
+    '/api/recipes/?ordering=trending',
+]
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
@@ -0,0 +1,41 @@
+import os
+from hashlib import sha256
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, именующее файлы по SHA-256 содержимого.
+
+    Одинаковые файлы хранятся в одном экземпляре: если файл с таким
+    содержимым уже есть, запись пропускается. Файлы удаляются только
+    командой collect_media по счётчикам ссылок.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory, filename = os.path.split(name)
+        name = '/'.join(filter(None, (
+            directory,
+            digest[:2],
+            digest + os.path.splitext(filename)[1].lower(),
+        )))
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def delete(self, name):
+        """Не удаляет файл: он может использоваться другими записями."""
+
+    def purge(self, name):
+        """Удаляет файл с диска."""
+        super().delete(name)
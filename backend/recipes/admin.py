@@ -1,8 +1,14 @@
+from functools import partial
+
 from django.contrib import admin
+from django.db.models import Count, OuterRef, Subquery
 
 from foodgram_backend.constants import MIN_AMOUNT
+from foodgram_backend.pagination import EstimatedCountPaginator
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
+from recipes.shopping_list import recipe_amounts
+from recipes.signals import recipe_composition_changed
 
 admin.site.empty_value_display = 'Null'
 
@@ -11,41 +17,78 @@ class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 1
     min_num = MIN_AMOUNT
+    autocomplete_fields = ('ingredient',)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Базовая админка для больших таблиц."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdmin):
     list_display = (
         'author',
         'name',
-        'image',
-        'text',
         'pub_date',
+        'in_favorites',
     )
-    list_editable = (
-        'name',
-        'image',
-        'text',
-    )
+    list_editable = ('name',)
     list_display_links = ('author',)
-    search_fields = ('author', 'name')
+    list_select_related = ('author',)
+    search_fields = ('author__username', 'name')
     list_filter = ('tags',)
+    autocomplete_fields = ('author', 'tags')
 
     inlines = (RecipeIngredientInline,)
 
-    @admin.display(description='Количество в избранном')
+    def save_related(self, request, form, formsets, change):
+        """Сохраняет теги и ингредиенты и сообщает об изменении состава."""
+        ingredients_changed = not change or any(
+            formset.has_changed() for formset in formsets
+        )
+        previous_amounts = None
+        if ingredients_changed:
+            previous_amounts = recipe_amounts(form.instance.id)
+        super().save_related(request, form, formsets, change)
+        if ingredients_changed or 'tags' in form.changed_data:
+            recipe_composition_changed.send(
+                sender=Recipe,
+                recipe=form.instance,
+                previous_amounts=previous_amounts,
+            )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=Subquery(
+                Favorite.objects.filter(recipe=OuterRef('pk'))
+                .values('recipe')
+                .annotate(count=Count('id'))
+                .values('count')
+            )
+        )
+
+    @admin.display(
+        description='Количество в избранном', ordering='favorites_count'
+    )
     def in_favorites(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count or 0
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(LargeTableAdmin):
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(Ingredient)
@@ -57,9 +100,41 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'slug')
+    search_fields = ('name',)
 
 
 @admin.register(RecipeIngredient)
-class RecipeIngredientAdmin(admin.ModelAdmin):
+class RecipeIngredientAdmin(LargeTableAdmin):
     list_display = ('recipe', 'ingredient')
     list_display_links = ('recipe', 'ingredient')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+
+    def change_composition(self, recipes, save):
+        """Вызывает ``save`` и сообщает об изменении состава рецептов."""
+        previous = {recipe: recipe_amounts(recipe.id) for recipe in recipes}
+        save()
+        for recipe, amounts in previous.items():
+            recipe_composition_changed.send(
+                sender=Recipe, recipe=recipe, previous_amounts=amounts
+            )
+
+    def save_model(self, request, obj, form, change):
+        recipes = {obj.recipe}
+        if change and 'recipe' in form.changed_data:
+            recipes.add(Recipe.objects.get(id=form.initial['recipe']))
+        self.change_composition(
+            recipes,
+            partial(super().save_model, request, obj, form, change),
+        )
+
+    def delete_model(self, request, obj):
+        self.change_composition(
+            [obj.recipe], partial(super().delete_model, request, obj)
+        )
+
+    def delete_queryset(self, request, queryset):
+        self.change_composition(
+            Recipe.objects.filter(id__in=queryset.values('recipe')),
+            partial(super().delete_queryset, request, queryset),
+        )
@@ -0,0 +1,115 @@
+from threading import Lock
+from time import monotonic, time_ns
+
+from django.core.cache import cache
+
+from foodgram_backend.constants import SNAPSHOT_TIMEOUT
+from recipes.models import Recipe
+
+
+class VersionedSnapshot:
+    """Снимок данных в памяти процесса, сверяемый со счётчиком в кэше.
+
+    Данные загружаются лениво при первом обращении и перечитываются,
+    когда другой процесс увеличил версию в общем кэше или истёк
+    ``timeout`` секунд с момента загрузки.
+    """
+
+    def __init__(self, key, loader, timeout=SNAPSHOT_TIMEOUT):
+        self.version_key = f'snapshot-version:{key}'
+        self.loader = loader
+        self.timeout = timeout
+        self._lock = Lock()
+        self._data = None
+        self._version = None
+        self._loaded_at = 0
+
+    def get_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, 0, None)
+            version = cache.get(self.version_key, 0)
+        return version
+
+    def is_stale(self, version):
+        return (
+            self._data is None
+            or self._version != version
+            or monotonic() - self._loaded_at > self.timeout
+        )
+
+    def get(self):
+        version = self.get_version()
+        if self.is_stale(version):
+            with self._lock:
+                if self.is_stale(version):
+                    self._data = self.loader()
+                    self._version = version
+                    self._loaded_at = monotonic()
+        return self._data
+
+    def bump_version(self):
+        try:
+            return cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, 1, None)
+            return 1
+
+    def invalidate(self):
+        """Сбрасывает снимок во всех процессах."""
+        self.bump_version()
+        with self._lock:
+            self._data = None
+
+    def apply(self, change):
+        """Применяет изменение к загруженному снимку без перечитывания.
+
+        Другие процессы перечитают данные по новой версии. Если версию
+        успел поменять кто-то ещё, локальный снимок тоже сбрасывается.
+        """
+        with self._lock:
+            version = self.bump_version()
+            if self._data is not None and version == self._version + 1:
+                change(self._data)
+                self._version = version
+            else:
+                self._data = None
+
+
+def _load_recipe_ids():
+    ids = frozenset(Recipe.objects.values_list('id', flat=True))
+    return ids, max(ids, default=0)
+
+
+recipe_ids = VersionedSnapshot('recipe-ids', _load_recipe_ids)
+
+
+def recipe_exists(recipe_id):
+    """Проверяет существование рецепта по снимку id без запроса к БД.
+
+    Id рецептов только растут, поэтому отсутствие в снимке id не больше
+    максимального означает, что рецепта нет. Более новые id проверяются
+    в базе, и при находке снимок сбрасывается.
+    """
+    ids, max_id = recipe_ids.get()
+    if recipe_id in ids:
+        return True
+    if recipe_id <= max_id:
+        return False
+    if Recipe.objects.filter(id=recipe_id).exists():
+        recipe_ids.invalidate()
+        return True
+    return False
+
+
+def _user_version_key(user_id):
+    return f'user-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Метка времени (нс) последнего изменения избранного и подписок."""
+    return cache.get_or_set(_user_version_key(user_id), time_ns, None)
+
+
+def bump_user_version(user_id):
+    cache.set(_user_version_key(user_id), time_ns(), None)
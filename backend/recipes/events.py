@@ -0,0 +1,152 @@
+import asyncio
+from collections import defaultdict
+from functools import lru_cache
+from threading import Lock
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from foodgram_backend.constants import (SSE_MAX_CONNECTIONS,
+                                        SSE_MAX_USER_CONNECTIONS,
+                                        SSE_QUEUE_SIZE)
+
+
+class Listener:
+    """Получатель событий одного соединения.
+
+    События складываются в очередь ограниченной длины в цикле событий
+    соединения. Если клиент не успевает их забирать, старые события
+    вытесняются новыми.
+    """
+
+    def __init__(self, owner, queue_size):
+        self.owner = owner
+        self.active = True
+        self.channels = frozenset()
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    def push(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """Следующее событие или None, если за ``timeout`` секунд их нет."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalEventBus:
+    """Шина событий в памяти процесса.
+
+    Доставляет события только соединениям этого процесса, поэтому
+    подходит для одного воркера. Для нескольких воркеров её заменяют
+    реализацией с тем же интерфейсом поверх общего брокера через
+    настройку EVENT_BUS. publish, follow и unfollow можно вызывать из
+    любого потока.
+    """
+
+    def __init__(
+        self,
+        max_listeners=SSE_MAX_CONNECTIONS,
+        max_owner_listeners=SSE_MAX_USER_CONNECTIONS,
+        queue_size=SSE_QUEUE_SIZE,
+    ):
+        self.max_listeners = max_listeners
+        self.max_owner_listeners = max_owner_listeners
+        self.queue_size = queue_size
+        self.listeners = defaultdict(set)
+        self.owners = defaultdict(set)
+        self.count = 0
+        self.lock = Lock()
+
+    def subscribe(self, owner, channels):
+        """Регистрирует получателя или возвращает None, если мест нет.
+
+        Вызывается из цикла событий соединения.
+        """
+        with self.lock:
+            if (
+                self.count >= self.max_listeners
+                or len(self.owners[owner]) >= self.max_owner_listeners
+            ):
+                return None
+            self.count += 1
+            listener = Listener(owner, self.queue_size)
+            self.owners[owner].add(listener)
+        self.set_channels(listener, channels)
+        return listener
+
+    def set_channels(self, listener, channels):
+        with self.lock:
+            self._set_channels(listener, frozenset(channels))
+
+    def _set_channels(self, listener, channels):
+        if not listener.active:
+            return
+        for channel in listener.channels - channels:
+            self._discard(channel, listener)
+        for channel in channels - listener.channels:
+            self.listeners[channel].add(listener)
+        listener.channels = channels
+
+    def follow(self, owner, channel):
+        """Добавляет канал всем соединениям получателя ``owner``."""
+        with self.lock:
+            for listener in self.owners.get(owner, ()):
+                self._set_channels(listener, listener.channels | {channel})
+
+    def unfollow(self, owner, channel):
+        """Убирает канал у всех соединений получателя ``owner``."""
+        with self.lock:
+            for listener in self.owners.get(owner, ()):
+                self._set_channels(listener, listener.channels - {channel})
+
+    def unsubscribe(self, listener):
+        with self.lock:
+            if not listener.active:
+                return
+            listener.active = False
+            for channel in listener.channels:
+                self._discard(channel, listener)
+            listener.channels = frozenset()
+            self.count -= 1
+            self.owners[listener.owner].discard(listener)
+            if not self.owners[listener.owner]:
+                del self.owners[listener.owner]
+
+    def _discard(self, channel, listener):
+        self.listeners[channel].discard(listener)
+        if not self.listeners[channel]:
+            del self.listeners[channel]
+
+    def publish(self, channel, event):
+        with self.lock:
+            listeners = list(self.listeners.get(channel, ()))
+        for listener in listeners:
+            try:
+                listener.loop.call_soon_threadsafe(listener.push, event)
+            except RuntimeError:
+                # Цикл событий соединения уже закрыт.
+                self.unsubscribe(listener)
+
+
+@lru_cache(maxsize=None)
+def get_event_bus():
+    return import_string(settings.EVENT_BUS)()
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+def publish_new_recipe(recipe_id, author_id, name):
+    """Сообщает подписчикам автора о новом рецепте."""
+    get_event_bus().publish(author_channel(author_id), {
+        'id': recipe_id,
+        'author': author_id,
+        'name': name,
+    })
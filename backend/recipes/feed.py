@@ -0,0 +1,148 @@
+from heapq import merge
+from itertools import groupby, islice
+
+from django.db.models import Count, Q
+
+from foodgram_backend.constants import (FEED_BATCH_SIZE,
+                                        FEED_FANOUT_MAX_FOLLOWERS)
+from recipes.cache import VersionedSnapshot
+from recipes.models import FeedItem, Recipe
+from users.models import Subscription
+
+
+def _load_popular_authors():
+    return frozenset(
+        Subscription.objects.values('publisher')
+        .annotate(followers=Count('id'))
+        .filter(followers__gt=FEED_FANOUT_MAX_FOLLOWERS)
+        .values_list('publisher', flat=True)
+    )
+
+
+popular_authors = VersionedSnapshot('popular-authors', _load_popular_authors)
+
+
+def _bulk_add(items):
+    FeedItem.objects.bulk_create(
+        items, batch_size=FEED_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def _add_author_recipes(follower_ids, publisher_id):
+    recipes = list(
+        Recipe.objects.filter(author=publisher_id).values_list(
+            'id', 'pub_date'
+        )
+    )
+    _bulk_add(
+        FeedItem(user_id=follower_id, recipe_id=recipe_id, pub_date=pub_date)
+        for follower_id in follower_ids
+        for recipe_id, pub_date in recipes
+    )
+
+
+def fan_out_recipe(recipe_id):
+    """Раскладывает новый рецепт по лентам подписчиков автора.
+
+    Рецепты авторов с большим числом подписчиков не раскладываются,
+    а подмешиваются в ленту при чтении.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None:
+        return
+    follower_ids = list(
+        Subscription.objects.filter(publisher=recipe.author_id)
+        .values_list('follower', flat=True)[:FEED_FANOUT_MAX_FOLLOWERS + 1]
+    )
+    if len(follower_ids) > FEED_FANOUT_MAX_FOLLOWERS:
+        if recipe.author_id not in popular_authors.get():
+            popular_authors.invalidate()
+        return
+    _bulk_add(
+        FeedItem(user_id=follower_id, recipe=recipe, pub_date=recipe.pub_date)
+        for follower_id in follower_ids
+    )
+
+
+def update_author_mode(publisher_id):
+    """Переключает автора между раскладкой и подмешиванием при чтении.
+
+    Пока у автора было много подписчиков, новые подписчики не получали
+    записей ленты. Когда их число опускается до порога, записи
+    раскладываются всем подписчикам до сброса снимка популярных
+    авторов, и рецепты из лент не пропадают.
+    """
+    followers = Subscription.objects.filter(publisher=publisher_id)
+    popular = followers.count() > FEED_FANOUT_MAX_FOLLOWERS
+    if popular == (publisher_id in popular_authors.get()):
+        return
+    if not popular:
+        _add_author_recipes(
+            followers.values_list('follower', flat=True), publisher_id
+        )
+    popular_authors.invalidate()
+
+
+def add_author_to_feed(follower_id, publisher_id):
+    """Добавляет в ленту подписчика уже опубликованные рецепты автора."""
+    if publisher_id not in popular_authors.get():
+        _add_author_recipes([follower_id], publisher_id)
+
+
+def remove_author_from_feed(follower_id, publisher_id):
+    """Убирает из ленты подписчика рецепты автора."""
+    FeedItem.objects.filter(
+        user=follower_id, recipe__author=publisher_id
+    ).delete()
+
+
+def rebuild_feed(user_id):
+    """Пересобирает ленту пользователя по его текущим подпискам."""
+    FeedItem.objects.filter(user=user_id).delete()
+    for publisher_id in Subscription.objects.filter(
+        follower=user_id
+    ).values_list('publisher', flat=True):
+        add_author_to_feed(user_id, publisher_id)
+
+
+def _keys(queryset, id_field, position, reverse, limit):
+    if position is not None:
+        pub_date, recipe_id = position
+        lookup = 'gt' if reverse else 'lt'
+        queryset = queryset.filter(
+            Q(**{f'pub_date__{lookup}': pub_date})
+            | Q(pub_date=pub_date, **{f'{id_field}__{lookup}': recipe_id})
+        )
+    ordering = ('pub_date', id_field)
+    if not reverse:
+        ordering = tuple(f'-{field}' for field in ordering)
+    return queryset.order_by(*ordering).values_list(
+        'pub_date', id_field
+    )[:limit]
+
+
+def feed_keys(user_id, position=None, reverse=False, limit=FEED_BATCH_SIZE):
+    """Ключи (pub_date, id рецепта) ленты после ``position``.
+
+    Записи ленты читаются из FeedItem по индексу (user, -pub_date),
+    рецепты популярных авторов из подписок подмешиваются из Recipe по
+    индексу (author, pub_date). Обе выборки уже упорядочены, поэтому
+    сливаются без сортировки всей ленты. С ``reverse`` ключи идут
+    по возрастанию, до ``position``.
+    """
+    followed_popular = popular_authors.get().intersection(
+        Subscription.objects.filter(follower=user_id)
+        .values_list('publisher', flat=True)
+    )
+    sources = [_keys(
+        FeedItem.objects.filter(user=user_id),
+        'recipe_id', position, reverse, limit,
+    )]
+    if followed_popular:
+        sources.append(_keys(
+            Recipe.objects.filter(author__in=followed_popular),
+            'id', position, reverse, limit,
+        ))
+    # Рецепт может оказаться в обеих выборках, пока автор меняет режим.
+    keys = (key for key, _ in groupby(merge(*sources, reverse=not reverse)))
+    return list(islice(keys, limit))
@@ -0,0 +1,101 @@
+import numpy as np
+
+from foodgram_backend.constants import (CAN_COOK_MAX_MISSING,
+                                        CAN_COOK_MAX_RESULTS)
+from recipes.cache import VersionedSnapshot
+from recipes.models import RecipeIngredient
+
+
+class IngredientIndex:
+    """Инвертированный индекс: ингредиент -> отсортированные id рецептов.
+
+    Списки рецептов хранятся как массивы NumPy, поэтому подсчёт
+    совпадений для набора ингредиентов сводится к слиянию массивов.
+    """
+
+    def __init__(self, pairs):
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        ingredients, starts = np.unique(pairs[:, 0], return_index=True)
+        self.postings = dict(zip(
+            ingredients.tolist(), np.split(pairs[:, 1], starts[1:])
+        ))
+        self.recipe_ids, self.sizes = np.unique(
+            pairs[:, 1], return_counts=True
+        )
+
+    def remove_recipe(self, recipe_id):
+        for ingredient_id, recipes in list(self.postings.items()):
+            position = np.searchsorted(recipes, recipe_id)
+            if position < len(recipes) and recipes[position] == recipe_id:
+                self.postings[ingredient_id] = np.delete(recipes, position)
+        position = np.searchsorted(self.recipe_ids, recipe_id)
+        if (
+            position < len(self.recipe_ids)
+            and self.recipe_ids[position] == recipe_id
+        ):
+            self.recipe_ids = np.delete(self.recipe_ids, position)
+            self.sizes = np.delete(self.sizes, position)
+
+    def set_recipe(self, recipe_id, ingredient_ids):
+        self.remove_recipe(recipe_id)
+        if not ingredient_ids:
+            return
+        for ingredient_id in ingredient_ids:
+            recipes = self.postings.get(
+                ingredient_id, np.empty(0, dtype=np.int64)
+            )
+            self.postings[ingredient_id] = np.insert(
+                recipes, np.searchsorted(recipes, recipe_id), recipe_id
+            )
+        position = np.searchsorted(self.recipe_ids, recipe_id)
+        self.recipe_ids = np.insert(self.recipe_ids, position, recipe_id)
+        self.sizes = np.insert(self.sizes, position, len(ingredient_ids))
+
+    def rank(self, ingredient_ids, max_missing=CAN_COOK_MAX_MISSING,
+             limit=CAN_COOK_MAX_RESULTS):
+        """Возвращает пары (id рецепта, число недостающих ингредиентов).
+
+        Пары отсортированы по числу недостающих ингредиентов.
+        """
+        postings = [
+            self.postings[ingredient_id] for ingredient_id in
+            set(ingredient_ids) if ingredient_id in self.postings
+        ]
+        if not postings:
+            return []
+        recipes, matched = np.unique(
+            np.concatenate(postings), return_counts=True
+        )
+        missing = (
+            self.sizes[np.searchsorted(self.recipe_ids, recipes)] - matched
+        )
+        suitable = missing <= max_missing
+        recipes, missing = recipes[suitable], missing[suitable]
+        order = np.argsort(missing, kind='stable')[:limit]
+        return list(zip(recipes[order].tolist(), missing[order].tolist()))
+
+
+def _load_index():
+    pairs = RecipeIngredient.objects.values_list('ingredient_id', 'recipe_id')
+    return IngredientIndex(
+        np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+    )
+
+
+ingredient_index = VersionedSnapshot('ingredient-index', _load_index)
+
+
+def sync_recipe(recipe_id):
+    """Обновляет индекс после изменения ингредиентов рецепта."""
+    ingredient_ids = list(
+        RecipeIngredient.objects.filter(recipe=recipe_id)
+        .values_list('ingredient_id', flat=True)
+    )
+    ingredient_index.apply(
+        lambda index: index.set_recipe(recipe_id, ingredient_ids)
+    )
+
+
+def remove_recipe(recipe_id):
+    """Убирает удалённый рецепт из индекса."""
+    ingredient_index.apply(lambda index: index.remove_recipe(recipe_id))
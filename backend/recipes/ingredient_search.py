@@ -0,0 +1,120 @@
+import re
+from collections import Counter, defaultdict
+
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, When
+
+from foodgram_backend.constants import (INGREDIENT_SEARCH_LIMIT,
+                                        TRIGRAM_MIN_QUERY_LENGTH,
+                                        TRIGRAM_SIMILARITY_THRESHOLD)
+from recipes.cache import VersionedSnapshot
+from recipes.models import Ingredient
+
+WORD_SEPARATOR = re.compile(r'[\W_]+')
+PREFIX, WORD_START, SIMILAR = range(3)
+
+
+def words(text):
+    return [word for word in WORD_SEPARATOR.split(text.lower()) if word]
+
+
+def trigrams(text):
+    """Триграммы слов строки с дополнением пробелами, как в pg_trgm."""
+    result = set()
+    for word in words(text):
+        padded = f'  {word} '
+        result.update(
+            padded[index:index + 3] for index in range(len(padded) - 2)
+        )
+    return result
+
+
+def match_rank(name, query):
+    """0 — совпадает начало названия, 1 — начало слова, 2 — похожее."""
+    name, query = name.lower(), query.lower()
+    if name.startswith(query):
+        return PREFIX
+    if any(word.startswith(query) for word in words(name)):
+        return WORD_START
+    return SIMILAR
+
+
+class TrigramIndex:
+    """Триграммный индекс названий ингредиентов в памяти процесса.
+
+    Используется вместо GIN-индекса pg_trgm на базах без него. Сходство
+    считается как доля триграмм запроса, найденных в названии, — это
+    близко к word_similarity из pg_trgm.
+    """
+
+    def __init__(self, ingredients):
+        self.names = dict(ingredients)
+        self.postings = defaultdict(list)
+        for ingredient_id, name in self.names.items():
+            for trigram in trigrams(name):
+                self.postings[trigram].append(ingredient_id)
+
+    def search(self, query, threshold=TRIGRAM_SIMILARITY_THRESHOLD,
+               limit=INGREDIENT_SEARCH_LIMIT):
+        """Возвращает id ингредиентов в порядке ранжирования."""
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+        matches = Counter()
+        for trigram in query_trigrams:
+            matches.update(self.postings.get(trigram, ()))
+        ranked = sorted(
+            (
+                match_rank(self.names[ingredient_id], query),
+                -count / len(query_trigrams),
+                self.names[ingredient_id],
+                ingredient_id,
+            )
+            for ingredient_id, count in matches.items()
+            if count / len(query_trigrams) >= threshold
+        )
+        return [ingredient_id for *_, ingredient_id in ranked[:limit]]
+
+
+def _load_index():
+    return TrigramIndex(Ingredient.objects.values_list('id', 'name'))
+
+
+trigram_index = VersionedSnapshot('ingredient-trigrams', _load_index)
+
+
+def rank_annotation(query):
+    return Case(
+        When(name__istartswith=query, then=PREFIX),
+        When(
+            Q(name__icontains=f' {query}') | Q(name__icontains=f'-{query}'),
+            then=WORD_START
+        ),
+        default=SIMILAR,
+        output_field=IntegerField(),
+    )
+
+
+def search_ingredients(queryset, query, limit=INGREDIENT_SEARCH_LIMIT):
+    """Нечёткий поиск ингредиентов с ранжированием и ограничением выдачи.
+
+    Короткие запросы ищутся по началу названия. Для остальных на
+    PostgreSQL используется GIN-индекс pg_trgm, на других базах —
+    триграммный индекс в памяти процесса.
+    """
+    query = query.strip()
+    if len(query) < TRIGRAM_MIN_QUERY_LENGTH:
+        return queryset.filter(name__istartswith=query)[:limit]
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        return queryset.filter(name__trigram_word_similar=query).annotate(
+            match_rank=rank_annotation(query),
+            similarity=TrigramWordSimilarity(query, 'name'),
+        ).order_by('match_rank', '-similarity', 'name')[:limit]
+    ingredient_ids = trigram_index.get().search(query, limit=limit)
+    ingredients = queryset.in_bulk(ingredient_ids)
+    return [
+        ingredients[ingredient_id] for ingredient_id in ingredient_ids
+        if ingredient_id in ingredients
+    ]
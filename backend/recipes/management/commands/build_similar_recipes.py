@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from foodgram_backend.constants import SIMILAR_BATCH_SIZE
+from recipes.similarity import rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта похожих рецептов."""
+    help = 'Пересчитывает похожие рецепты по общим ингредиентам и тегам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=SIMILAR_BATCH_SIZE,
+            help='Количество рецептов в одной пачке расчёта'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_similar_recipes(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Похожие рецепты рассчитаны для {count}')
+        )
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from recipes.models import MediaBlob, Recipe
+from tasks.models import Task
+
+User = get_user_model()
+
+MEDIA_DIRECTORIES = ('recipes', 'avatars', 'tasks')
+
+
+class Command(BaseCommand):
+    """Команда для удаления неиспользуемых медиафайлов."""
+    help = 'Удаляет медиафайлы, на которые не ссылается ни одна запись'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scan', action='store_true',
+            help='Также проверить все файлы на диске, а не только счётчики'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы, которые будут удалены'
+        )
+
+    def is_referenced(self, name):
+        return (
+            Recipe.objects.filter(image=name).exists()
+            or User.objects.filter(avatar=name).exists()
+            or Task.objects.filter(result=name).exists()
+        )
+
+    def walk(self, directory):
+        if not default_storage.exists(directory):
+            return
+        subdirectories, files = default_storage.listdir(directory)
+        for name in files:
+            yield f'{directory}/{name}'
+        for subdirectory in subdirectories:
+            yield from self.walk(f'{directory}/{subdirectory}')
+
+    def collect(self, name, dry_run):
+        if self.is_referenced(name):
+            return False
+        if not dry_run:
+            default_storage.purge(name)
+            MediaBlob.objects.filter(name=name).delete()
+        self.stdout.write(name)
+        return True
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        removed = 0
+        for name in MediaBlob.objects.filter(
+            references__lte=0
+        ).values_list('name', flat=True).iterator():
+            removed += self.collect(name, dry_run)
+        if options['scan']:
+            tracked = set(MediaBlob.objects.filter(
+                references__gt=0
+            ).values_list('name', flat=True))
+            for directory in MEDIA_DIRECTORIES:
+                for name in self.walk(directory):
+                    if name not in tracked:
+                        removed += self.collect(name, dry_run)
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено файлов: {removed}')
+        )
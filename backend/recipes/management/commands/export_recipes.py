@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from foodgram_backend.constants import TRANSFER_BATCH_SIZE
+from recipes.transfer import export_lines
+
+
+class Command(BaseCommand):
+    """Команда для выгрузки рецептов в JSONL."""
+    help = (
+        'Выгружает авторов и рецепты с тегами и ингредиентами в JSONL '
+        'для переноса на другой экземпляр командой import_recipes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='Файл выгрузки (по умолчанию стандартный вывод)'
+        )
+        parser.add_argument(
+            '--media-dir',
+            help='Каталог, в который копируются изображения рецептов'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE,
+            help='Количество рецептов, читаемых из базы за один запрос'
+        )
+
+    def handle(self, *args, **options):
+        output = sys.stdout
+        if options['output'] != '-':
+            output = open(options['output'], 'w', encoding='utf-8')
+        count = 0
+        try:
+            for line in export_lines(
+                options['media_dir'], options['batch_size']
+            ):
+                output.write(line + '\n')
+                count += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f'Выгружено строк: {count}'))
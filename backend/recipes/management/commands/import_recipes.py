@@ -0,0 +1,69 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram_backend.constants import TRANSFER_BATCH_SIZE
+from recipes.transfer import RecipeImporter, read_batches
+
+
+class Command(BaseCommand):
+    """Команда для загрузки рецептов из выгрузки export_recipes."""
+    help = (
+        'Загружает авторов и рецепты из JSONL пачками. После каждой пачки '
+        'номер строки записывается в файл <файл>.progress, с --resume '
+        'загрузка продолжается с него'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл выгрузки')
+        parser.add_argument(
+            '--media-dir',
+            help='Каталог с изображениями, выгруженными с --media-dir'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE,
+            help='Количество строк в одной транзакции'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку'
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['input']):
+            raise CommandError(f'Файл {options["input"]} не найден')
+        progress = options['input'] + '.progress'
+        skip = 0
+        if options['resume'] and os.path.exists(progress):
+            with open(progress) as file:
+                skip = int(file.read() or 0)
+        importer = RecipeImporter(options['media_dir'])
+        try:
+            with open(options['input'], encoding='utf-8') as file:
+                for number, lines in read_batches(
+                    file, options['batch_size'], skip
+                ):
+                    importer.import_batch(lines)
+                    with open(progress, 'w') as checkpoint:
+                        checkpoint.write(str(number))
+        finally:
+            importer.finish()
+        if os.path.exists(progress):
+            os.remove(progress)
+        stats = importer.stats
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано рецептов: {stats["created"]}, '
+            f'пропущено существующих: {stats["skipped"]}'
+        ))
+        if stats['unknown_authors']:
+            self.stdout.write(self.style.WARNING(
+                f'Рецептов без автора в выгрузке: {stats["unknown_authors"]}'
+            ))
+        if stats['missing_images']:
+            self.stdout.write(self.style.WARNING(
+                f'Рецептов без файла изображения: {stats["missing_images"]}'
+            ))
+        self.stdout.write(
+            'Для обновления производных данных выполните rebuild_feed, '
+            'build_similar_recipes и update_recipe_scores'
+        )
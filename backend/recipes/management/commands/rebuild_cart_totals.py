@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from foodgram_backend.constants import CART_BATCH_SIZE
+from recipes.shopping_list import rebuild_cart_totals
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта итогов корзин."""
+    help = (
+        'Пересчитывает итоги корзин по рецептам в корзине. Нужна, если '
+        'ингредиенты рецептов менялись в обход API и админки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'users', nargs='*', type=int,
+            help='id пользователей (по умолчанию все с корзиной)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=CART_BATCH_SIZE,
+            help='Количество пользователей в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(shopping_cart__isnull=False) | Q(cart_ingredients__isnull=False)
+        ).distinct()
+        if options['users']:
+            users = User.objects.filter(id__in=options['users'])
+        user_ids = list(users.values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            rebuild_cart_totals(user_ids[start:start + batch_size])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано корзин: {len(user_ids)}')
+        )
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from foodgram_backend.constants import FEED_BATCH_SIZE
+from recipes.feed import popular_authors, rebuild_feed
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Команда для пересборки лент подписок."""
+    help = 'Пересобирает ленты подписок пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'users', nargs='*', type=int,
+            help='id пользователей (по умолчанию все подписчики)'
+        )
+
+    def handle(self, *args, **options):
+        popular_authors.invalidate()
+        users = User.objects.filter(
+            Q(follower__isnull=False) | Q(feed_items__isnull=False)
+        ).distinct()
+        if options['users']:
+            users = User.objects.filter(id__in=options['users'])
+        count = 0
+        for user_id in users.values_list('id', flat=True).iterator(
+            chunk_size=FEED_BATCH_SIZE
+        ):
+            with transaction.atomic():
+                rebuild_feed(user_id)
+            count += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересобрано лент: {count}')
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from foodgram_backend.constants import SCORE_BATCH_SIZE
+from recipes.ranking import update_scores
+
+
+class Command(BaseCommand):
+    """Команда для пересчёта популярности рецептов."""
+    help = (
+        'Пересчитывает популярность и тренды рецептов по часовым '
+        'интервалам и удаляет устаревшие интервалы. Запускается по '
+        'расписанию, например раз в час'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=SCORE_BATCH_SIZE,
+            help='Количество рецептов в одной пачке обновления'
+        )
+
+    def handle(self, *args, **options):
+        count = update_scores(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Оценки обновлены у {count} рецептов')
+        )
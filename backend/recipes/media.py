@@ -0,0 +1,52 @@
+from django.db.models import F
+
+from recipes.models import MediaBlob
+
+
+def add_reference(name, count=1):
+    """Увеличивает счётчик ссылок на файл на ``count``."""
+    if not name:
+        return
+    _, created = MediaBlob.objects.get_or_create(
+        name=name, defaults={'references': count}
+    )
+    if not created:
+        MediaBlob.objects.filter(name=name).update(
+            references=F('references') + count
+        )
+
+
+def remove_reference(name):
+    """Уменьшает счётчик ссылок на файл."""
+    if name:
+        MediaBlob.objects.filter(name=name).update(
+            references=F('references') - 1
+        )
+
+
+def remember_file(sender, instance, field_name, update_fields=None):
+    """Запоминает имя файла поля до сохранения записи."""
+    if update_fields is not None and field_name not in update_fields:
+        return
+    old_name = ''
+    if instance.pk is not None:
+        old_name = sender.objects.filter(pk=instance.pk).values_list(
+            field_name, flat=True
+        ).first() or ''
+    instance.__dict__.setdefault('_previous_files', {})[field_name] = old_name
+
+
+def track_file_change(instance, field_name):
+    """Переносит ссылку со старого файла поля на новый после сохранения.
+
+    Имя нового файла известно только после записи файла в хранилище,
+    то есть после сохранения самой записи.
+    """
+    previous = instance.__dict__.get('_previous_files', {})
+    if field_name not in previous:
+        return
+    old_name = previous.pop(field_name)
+    new_name = getattr(instance, field_name).name or ''
+    if old_name != new_name:
+        remove_reference(old_name)
+        add_reference(new_name)
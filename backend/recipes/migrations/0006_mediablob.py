@@ -0,0 +1,46 @@
+# Generated by Django 4.2.11 on 2026-10-19 08:38
+
+from django.db import migrations, models
+
+
+def count_references(apps, schema_editor):
+    MediaBlob = apps.get_model('recipes', 'MediaBlob')
+    sources = (
+        (apps.get_model('recipes', 'Recipe'), 'image'),
+        (apps.get_model('users', 'CustomUser'), 'avatar'),
+    )
+    references = {}
+    for model, field_name in sources:
+        for row in model.objects.exclude(**{field_name: ''}).exclude(
+            **{f'{field_name}__isnull': True}
+        ).values(field_name).annotate(total=models.Count('pk')):
+            name = row[field_name]
+            references[name] = references.get(name, 0) + row['total']
+    MediaBlob.objects.bulk_create(
+        MediaBlob(name=name, references=total)
+        for name, total in references.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('recipes', '0005_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Путь к файлу')),
+                ('references', models.IntegerField(default=0, verbose_name='Количество ссылок')),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,146 @@
+# Generated by Django 4.2.11 on 2026-10-19 08:53
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Копии настроек и расчёта оценок из recipes.ranking на момент этой
+# миграции: она не должна меняться вместе с кодом приложения.
+BATCH_SIZE = 1000
+POPULAR_WINDOW = timedelta(days=30)
+TRENDING_WINDOW = timedelta(days=7)
+HALF_LIFE = timedelta(hours=24)
+WEIGHTS = {'favorites': 2, 'carts': 1}
+
+
+def bucket_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def spread_created_at(model, now):
+    """Распределяет даты добавления между публикацией рецепта и ``now``.
+
+    Настоящие даты неизвестны; id растут со временем, поэтому записи
+    каждого рецепта получают даты в порядке id. Возвращает счётчики
+    добавлений по (рецепт, начало часа) в окне популярности.
+    """
+    buckets = Counter()
+    rows = model.objects.order_by('recipe', 'id').values_list(
+        'id', 'recipe', 'recipe__pub_date'
+    )
+    changed = []
+    for (recipe_id, pub_date), group in groupby(
+        rows.iterator(), key=lambda row: row[1:]
+    ):
+        ids = [row[0] for row in group]
+        step = (now - min(pub_date, now)) / len(ids)
+        for number, row_id in enumerate(ids):
+            created_at = now - step * (len(ids) - number - 0.5)
+            changed.append(model(id=row_id, created_at=created_at))
+            if now - created_at <= POPULAR_WINDOW:
+                buckets[recipe_id, bucket_start(created_at)] += 1
+        if len(changed) >= BATCH_SIZE:
+            model.objects.bulk_update(changed, ['created_at'])
+            changed = []
+    model.objects.bulk_update(changed, ['created_at'])
+    return buckets
+
+
+def backfill_activity(apps, schema_editor):
+    """Заполняет даты, активность и оценки для существующих добавлений."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeActivity = apps.get_model('recipes', 'RecipeActivity')
+    now = django.utils.timezone.now()
+    counts = {
+        'favorites': spread_created_at(
+            apps.get_model('recipes', 'Favorite'), now
+        ),
+        'carts': spread_created_at(
+            apps.get_model('recipes', 'ShoppingCart'), now
+        ),
+    }
+    buckets = counts['favorites'].keys() | counts['carts'].keys()
+    RecipeActivity.objects.bulk_create(
+        [
+            RecipeActivity(
+                recipe_id=recipe_id,
+                bucket=bucket,
+                favorites=counts['favorites'][recipe_id, bucket],
+                carts=counts['carts'][recipe_id, bucket],
+            )
+            for recipe_id, bucket in buckets
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    scores = defaultdict(lambda: [0, 0])
+    for recipe_id, bucket in buckets:
+        score = sum(
+            counts[kind][recipe_id, bucket] * weight
+            for kind, weight in WEIGHTS.items()
+        )
+        scores[recipe_id][0] += score
+        if now - bucket <= TRENDING_WINDOW:
+            scores[recipe_id][1] += score * 0.5 ** ((now - bucket) / HALF_LIFE)
+    Recipe.objects.bulk_update(
+        [
+            Recipe(id=recipe_id, popularity=popularity, trending=trending)
+            for recipe_id, (popularity, trending) in scores.items()
+        ],
+        ['popularity', 'trending'],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_ingredient_name_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Популярность за последние дни'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(db_index=True, verbose_name='Начало часа')),
+                ('favorites', models.IntegerField(default=0, verbose_name='Добавлений в избранное')),
+                ('carts', models.IntegerField(default=0, verbose_name='Добавлений в корзину')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Активность по рецепту',
+                'verbose_name_plural': 'Активность по рецептам',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipeactivity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'bucket'), name='unique_recipe_activity'),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
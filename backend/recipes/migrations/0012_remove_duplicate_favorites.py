@@ -0,0 +1,108 @@
+# Generated by Django 4.2.11 on 2026-10-19 11:30
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import F, Min, Sum
+from django.utils import timezone
+
+# Копии настроек и расчёта оценок из recipes.ranking на момент этой
+# миграции: она не должна меняться вместе с кодом приложения.
+POPULAR_WINDOW = timedelta(days=30)
+TRENDING_WINDOW = timedelta(days=7)
+HALF_LIFE = timedelta(hours=24)
+WEIGHTS = {'favorites': 2, 'carts': 1}
+
+
+def bucket_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def update_scores(Recipe, RecipeActivity, recipe_ids, now):
+    """Пересчитывает оценки рецептов по их часовой активности."""
+    scores = defaultdict(lambda: [0, 0])
+    for recipe_id, bucket, favorites, carts in (
+        RecipeActivity.objects.filter(
+            recipe__in=recipe_ids, bucket__gte=now - POPULAR_WINDOW
+        ).values_list('recipe', 'bucket', 'favorites', 'carts')
+    ):
+        score = (
+            favorites * WEIGHTS['favorites'] + carts * WEIGHTS['carts']
+        )
+        scores[recipe_id][0] += score
+        if now - bucket <= TRENDING_WINDOW:
+            scores[recipe_id][1] += score * 0.5 ** ((now - bucket) / HALF_LIFE)
+    Recipe.objects.bulk_update(
+        [
+            Recipe(
+                id=recipe_id,
+                popularity=scores[recipe_id][0],
+                trending=scores[recipe_id][1],
+            )
+            for recipe_id in recipe_ids
+        ],
+        ['popularity', 'trending'],
+    )
+
+
+def remove_duplicates(apps, schema_editor):
+    """Удаляет повторные добавления рецепта в избранное и корзину.
+
+    Остаётся первое добавление. Повторы вычитаются из часовой
+    активности, итоги корзин затронутых пользователей пересчитываются.
+    Закэшированные списки покупок сбрасывает команда
+    rebuild_cart_totals после деплоя.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeActivity = apps.get_model('recipes', 'RecipeActivity')
+    CartIngredient = apps.get_model('recipes', 'CartIngredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    now = timezone.now()
+    cart_users, recipe_ids = set(), set()
+    for model_name, kind in (('Favorite', 'favorites'),
+                             ('ShoppingCart', 'carts')):
+        model = apps.get_model('recipes', model_name)
+        duplicates = model.objects.exclude(
+            id__in=model.objects.values('user', 'recipe')
+            .annotate(first=Min('id')).values('first')
+        )
+        buckets = Counter(
+            (recipe_id, bucket_start(created_at))
+            for recipe_id, created_at in duplicates.filter(
+                created_at__gte=now - POPULAR_WINDOW
+            ).values_list('recipe', 'created_at')
+        )
+        recipe_ids.update(recipe_id for recipe_id, _ in buckets)
+        if kind == 'carts':
+            cart_users.update(duplicates.values_list('user', flat=True))
+        for (recipe_id, bucket), count in buckets.items():
+            RecipeActivity.objects.filter(
+                recipe=recipe_id, bucket=bucket
+            ).update(**{kind: F(kind) - count})
+        duplicates.delete()
+    if cart_users:
+        CartIngredient.objects.filter(user__in=cart_users).delete()
+        CartIngredient.objects.bulk_create(
+            CartIngredient(
+                user_id=row['recipe__shopping_cart__user'],
+                ingredient_id=row['ingredient'],
+                amount=row['total'],
+            )
+            for row in RecipeIngredient.objects.filter(
+                recipe__shopping_cart__user__in=cart_users
+            ).values('recipe__shopping_cart__user', 'ingredient')
+            .annotate(total=Sum('amount')).order_by()
+        )
+    update_scores(Recipe, RecipeActivity, recipe_ids, now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_feeditem_pub_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from foodgram_backend.constants import (CART_SCORE_WEIGHT,
+                                        FAVORITE_SCORE_WEIGHT,
+                                        POPULAR_WINDOW_DAYS, SCORE_BATCH_SIZE,
+                                        TRENDING_HALF_LIFE_HOURS,
+                                        TRENDING_WINDOW_DAYS)
+from recipes.models import Recipe, RecipeActivity
+
+WEIGHTS = {'favorites': FAVORITE_SCORE_WEIGHT, 'carts': CART_SCORE_WEIGHT}
+POPULAR_WINDOW = timedelta(days=POPULAR_WINDOW_DAYS)
+TRENDING_WINDOW = timedelta(days=TRENDING_WINDOW_DAYS)
+HALF_LIFE = timedelta(hours=TRENDING_HALF_LIFE_HOURS)
+
+
+def bucket_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def decay(age):
+    """Вес события возраста ``age`` в трендах: половина за HALF_LIFE."""
+    return 0.5 ** (age / HALF_LIFE)
+
+
+def record_event(recipe_id, created_at, kind, delta):
+    """Учитывает добавление (+1) или удаление (-1) рецепта.
+
+    ``kind`` — 'favorites' или 'carts'. Счётчик часового интервала
+    события и оценки рецепта меняются на месте. Удаление события, для
+    которого нет интервала (оно старше окна или появилось до подсчёта),
+    оценки не меняет.
+    """
+    age = timezone.now() - created_at
+    if age > POPULAR_WINDOW:
+        return
+    bucket = bucket_start(created_at)
+    if delta > 0:
+        RecipeActivity.objects.get_or_create(
+            recipe_id=recipe_id, bucket=bucket
+        )
+    if not RecipeActivity.objects.filter(
+        recipe=recipe_id, bucket=bucket
+    ).update(**{kind: F(kind) + delta}):
+        return
+    score = delta * WEIGHTS[kind]
+    Recipe.objects.filter(id=recipe_id).update(
+        popularity=F('popularity') + score,
+        trending=F('trending') + (
+            score * decay(age) if age <= TRENDING_WINDOW else 0
+        ),
+    )
+
+
+def update_scores(batch_size=SCORE_BATCH_SIZE):
+    """Пересчитывает оценки по часовым интервалам с учётом затухания.
+
+    Интервалы старше окна популярности удаляются. Возвращает число
+    рецептов, у которых изменились оценки.
+    """
+    now = timezone.now()
+    RecipeActivity.objects.filter(bucket__lt=now - POPULAR_WINDOW).delete()
+    scores = defaultdict(lambda: [0, 0])
+    for recipe_id, bucket, favorites, carts in (
+        RecipeActivity.objects.values_list(
+            'recipe', 'bucket', 'favorites', 'carts'
+        ).iterator(chunk_size=batch_size)
+    ):
+        score = (
+            favorites * WEIGHTS['favorites'] + carts * WEIGHTS['carts']
+        )
+        scores[recipe_id][0] += score
+        if now - bucket <= TRENDING_WINDOW:
+            scores[recipe_id][1] += score * decay(now - bucket)
+    changed = []
+    for recipe in Recipe.objects.filter(
+        Q(id__in=RecipeActivity.objects.values('recipe'))
+        | ~Q(popularity=0)
+        | ~Q(trending=0)
+    ).only('id', 'popularity', 'trending').iterator(chunk_size=batch_size):
+        popularity, trending = scores.get(recipe.id, (0, 0))
+        if (recipe.popularity, recipe.trending) != (popularity, trending):
+            recipe.popularity, recipe.trending = popularity, trending
+            changed.append(recipe)
+    Recipe.objects.bulk_update(
+        changed, ['popularity', 'trending'], batch_size=batch_size
+    )
+    return len(changed)
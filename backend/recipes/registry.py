@@ -0,0 +1,40 @@
+from recipes.cache import VersionedSnapshot
+from recipes.models import Ingredient, Tag
+
+
+def _load_reference_data():
+    return {
+        Tag: {tag.id: tag for tag in Tag.objects.all()},
+        Ingredient: {
+            ingredient.id: ingredient
+            for ingredient in Ingredient.objects.all()
+        },
+    }
+
+
+# Теги и ингредиенты в памяти процесса: их мало и они редко меняются.
+# Объекты общие для всех потоков, их нельзя изменять.
+reference_data = VersionedSnapshot('reference-data', _load_reference_data)
+
+
+def cached_object(model, pk):
+    """Тег или ингредиент из реестра, None если его там нет."""
+    return reference_data.get()[model].get(pk)
+
+
+def lookup(model, ids):
+    """Возвращает {id: объект} для существующих тегов или ингредиентов.
+
+    Объекты берутся из реестра. Id, которых в нём нет, проверяются в
+    базе одним запросом: если они нашлись, реестр устарел и
+    сбрасывается.
+    """
+    rows = reference_data.get()[model]
+    found = {pk: rows[pk] for pk in ids if pk in rows}
+    missing = set(ids) - found.keys()
+    if missing:
+        loaded = model.objects.in_bulk(missing)
+        if loaded:
+            reference_data.invalidate()
+        found.update(loaded)
+    return found
@@ -0,0 +1,229 @@
+from time import time_ns
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+
+from foodgram_backend.constants import (CART_BATCH_SIZE,
+                                        SHOPPING_LIST_CACHE_TIMEOUT)
+from recipes.models import (CartIngredient, Ingredient, RecipeIngredient,
+                            ShoppingCart)
+from recipes.registry import lookup
+
+# Единица измерения -> (базовая единица, множитель к базовой).
+UNIT_CONVERSIONS = {
+    'мг': ('г', 0.001),
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'капля': ('мл', 0.05),
+    'ч. л.': ('мл', 5),
+    'ст. л.': ('мл', 15),
+    'мл': ('мл', 1),
+    'стакан': ('мл', 250),
+    'л': ('мл', 1000),
+}
+# Базовая единица -> единицы для вывода по убыванию множителя.
+DISPLAY_UNITS = {
+    'г': (('кг', 1000), ('г', 1)),
+    'мл': (('л', 1000), ('мл', 1)),
+}
+
+
+def _format_amount(amount):
+    return f'{amount:.2f}'.rstrip('0').rstrip('.')
+
+
+def _display(amount, base_unit):
+    for unit, factor in DISPLAY_UNITS.get(base_unit, ()):
+        if amount >= factor:
+            return amount / factor, unit
+    return amount, base_unit
+
+
+def normalize_shopping_list(rows):
+    """Сводит строки списка покупок к одной строке на продукт.
+
+    Одноимённые продукты с единицами из одной группы (г и кг, мл и л,
+    ложки) пересчитываются в базовую единицу и суммируются за один
+    векторный проход. Если у продукта всего одна единица, она
+    сохраняется, иначе выбирается наиболее удобная для чтения.
+    """
+    import numpy as np
+
+    if not rows:
+        return []
+    names = np.array([row['name'].strip().lower() for row in rows])
+    units = np.array([row['measurement_unit'].strip() for row in rows])
+    conversions = [UNIT_CONVERSIONS.get(unit, (unit, 1)) for unit in units]
+    base_units = np.array([base_unit for base_unit, _ in conversions])
+    amounts = np.array(
+        [row['total'] for row in rows], dtype=np.float64
+    ) * np.array([factor for _, factor in conversions])
+    keys, first, inverse = np.unique(
+        np.char.add(np.char.add(names, '\0'), base_units),
+        return_index=True,
+        return_inverse=True,
+    )
+    totals = np.bincount(inverse, weights=amounts, minlength=len(keys))
+    mixed = np.bincount(
+        inverse, weights=units != units[first][inverse], minlength=len(keys)
+    ) > 0
+    shopping_list = []
+    for group, row in enumerate(first.tolist()):
+        if mixed[group]:
+            amount, unit = _display(totals[group], base_units[row])
+        else:
+            amount, unit = totals[group] / conversions[row][1], units[row]
+        shopping_list.append({
+            'name': rows[row]['name'],
+            'measurement_unit': str(unit),
+            'amount': _format_amount(float(amount)),
+        })
+    return shopping_list
+
+
+def _version_key(user_id):
+    return f'shopping-list-version:{user_id}'
+
+
+def bump_cart_versions(user_ids):
+    """Помечает закэшированные списки покупок пользователей устаревшими."""
+    cache.set_many(
+        {_version_key(user_id): time_ns() for user_id in user_ids}, None
+    )
+
+
+def get_cart_version(user_id):
+    """Метка времени (нс) последнего изменения корзины пользователя."""
+    return cache.get_or_set(_version_key(user_id), time_ns, None)
+
+
+def cart_rows(user_id):
+    """Итоги корзины: пары (id ингредиента, количество)."""
+    return CartIngredient.objects.filter(user=user_id).values_list(
+        'ingredient', 'amount'
+    )
+
+
+def build_shopping_list(user_id):
+    """Собирает нормализованный список покупок без кэша.
+
+    Количества читаются из готовых итогов корзины, названия и единицы —
+    из реестра ингредиентов.
+    """
+    totals = dict(cart_rows(user_id))
+    return normalize_shopping_list([
+        {
+            'name': ingredient.name,
+            'measurement_unit': ingredient.measurement_unit,
+            'total': totals[ingredient_id],
+        }
+        for ingredient_id, ingredient in lookup(Ingredient, totals).items()
+    ])
+
+
+def get_shopping_list(user):
+    """Возвращает нормализованный список покупок пользователя.
+
+    Результат кэшируется по версии корзины и переиспользуется всеми
+    форматами выгрузки.
+    """
+    key = f'shopping-list:{user.id}:{get_cart_version(user.id)}'
+    shopping_list = cache.get(key)
+    if shopping_list is None:
+        shopping_list = build_shopping_list(user.id)
+        cache.set(key, shopping_list, SHOPPING_LIST_CACHE_TIMEOUT)
+    return shopping_list
+
+
+def cart_users(recipe):
+    """Возвращает id пользователей, у которых рецепт в корзине."""
+    return ShoppingCart.objects.filter(recipe=recipe).values_list(
+        'user', flat=True
+    )
+
+
+def recipe_amounts(recipe_id):
+    """Количества ингредиентов рецепта: id ингредиента -> сумма."""
+    return dict(
+        RecipeIngredient.objects.filter(recipe=recipe_id)
+        .values_list('ingredient').annotate(total=Sum('amount')).order_by()
+    )
+
+
+def _shift_totals(user_ids, difference):
+    """Прибавляет ``difference`` к итогам корзин пользователей.
+
+    ``difference`` — id ингредиента -> изменение количества, одинаковое
+    для всех пользователей. Недостающие строки итогов создаются с
+    нулём, затем все количества меняются одним UPDATE. Обнулившиеся
+    строки удаляются.
+    """
+    difference = {
+        ingredient_id: delta
+        for ingredient_id, delta in difference.items() if delta
+    }
+    if not user_ids or not difference:
+        return
+    totals = CartIngredient.objects.filter(
+        user__in=user_ids, ingredient__in=difference
+    )
+    with transaction.atomic():
+        CartIngredient.objects.bulk_create(
+            (
+                CartIngredient(
+                    user_id=user_id, ingredient_id=ingredient_id, amount=0
+                )
+                for user_id in user_ids
+                for ingredient_id, delta in difference.items() if delta > 0
+            ),
+            batch_size=CART_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        totals.update(amount=F('amount') + Case(
+            *(
+                When(ingredient=ingredient_id, then=delta)
+                for ingredient_id, delta in difference.items()
+            ),
+            output_field=IntegerField(),
+        ))
+        totals.filter(amount__lte=0).delete()
+
+
+def change_cart_totals(user_id, recipe_id, sign):
+    """Прибавляет (sign=1) или вычитает (sign=-1) ингредиенты рецепта."""
+    _shift_totals([user_id], {
+        ingredient_id: sign * amount
+        for ingredient_id, amount in recipe_amounts(recipe_id).items()
+    })
+
+
+def shift_cart_totals(user_ids, difference):
+    """Меняет итоги корзин пользователей на ``difference``.
+
+    Вызывается, когда рецепт из этих корзин изменил состав или удалён.
+    """
+    user_ids = list(user_ids)
+    _shift_totals(user_ids, difference)
+    bump_cart_versions(user_ids)
+
+
+def rebuild_cart_totals(user_ids):
+    """Пересчитывает итоги корзин пользователей по рецептам в корзине."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    with transaction.atomic():
+        CartIngredient.objects.filter(user__in=user_ids).delete()
+        CartIngredient.objects.bulk_create(
+            CartIngredient(
+                user_id=row['recipe__shopping_cart__user'],
+                ingredient_id=row['ingredient'],
+                amount=row['total'],
+            )
+            for row in RecipeIngredient.objects.filter(
+                recipe__shopping_cart__user__in=user_ids
+            ).values('recipe__shopping_cart__user', 'ingredient')
+            .annotate(total=Sum('amount')).order_by()
+        )
+    bump_cart_versions(user_ids)
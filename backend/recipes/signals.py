@@ -0,0 +1,294 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from foodgram_backend.constants import CART_SYNC_MAX_USERS
+from recipes.cache import bump_user_version, recipe_ids
+from recipes.events import author_channel, get_event_bus, publish_new_recipe
+from recipes.feed import (add_author_to_feed, popular_authors,
+                          remove_author_from_feed)
+from recipes.ingredient_search import trigram_index
+from recipes.media import remember_file, remove_reference, track_file_change
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                            SimilarRecipe, Tag)
+from recipes.ranking import record_event
+from recipes.registry import reference_data
+from recipes.shopping_list import (bump_cart_versions, cart_users,
+                                   change_cart_totals, recipe_amounts,
+                                   shift_cart_totals)
+from tasks.queue import enqueue
+from users.models import Subscription
+
+User = get_user_model()
+
+# Отправляется после записи тегов и ингредиентов рецепта. Аргументы:
+# recipe и previous_amounts — количества ингредиентов до изменения
+# (id ингредиента -> сумма) или None, если ингредиенты не менялись.
+recipe_composition_changed = Signal()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    """Сбрасывает снимок id и ставит раскладку рецепта по лентам."""
+    if created:
+        recipe_ids.invalidate()
+        enqueue('fan_out_recipe', recipe_id=instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+def notify_followers(sender, instance, created, **kwargs):
+    """Оповещает подключённых подписчиков автора о новом рецепте."""
+    if created:
+        event = (instance.id, instance.author_id, instance.name)
+        transaction.on_commit(lambda: publish_new_recipe(*event))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Сбрасывает снимок id и убирает рецепт из индекса ингредиентов."""
+    from recipes.ingredient_index import remove_recipe
+
+    recipe_ids.invalidate()
+    recipe_id = instance.id
+    transaction.on_commit(lambda: remove_recipe(recipe_id))
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    """Добавляет рецепты автора в ленту и поток событий подписчика."""
+    bump_user_version(instance.follower_id)
+    if created:
+        add_author_to_feed(instance.follower_id, instance.publisher_id)
+        follower_id, channel = (
+            instance.follower_id, author_channel(instance.publisher_id)
+        )
+        transaction.on_commit(
+            lambda: get_event_bus().follow(follower_id, channel)
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    """Убирает рецепты автора из ленты и потока событий отписавшегося.
+
+    Если подписчиков у популярного автора стало меньше порога, его
+    рецепты снова раскладываются по лентам в фоновой задаче.
+    """
+    bump_user_version(instance.follower_id)
+    remove_author_from_feed(instance.follower_id, instance.publisher_id)
+    follower_id, channel = (
+        instance.follower_id, author_channel(instance.publisher_id)
+    )
+    transaction.on_commit(
+        lambda: get_event_bus().unfollow(follower_id, channel)
+    )
+    if instance.publisher_id in popular_authors.get():
+        enqueue('update_author_mode', publisher_id=instance.publisher_id)
+
+
+@receiver(recipe_composition_changed)
+def update_similar(sender, recipe, **kwargs):
+    """Ставит пересчёт похожих рецептов в очередь задач."""
+    enqueue('update_similar_recipes', recipe_id=recipe.id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def refresh_similar(sender, instance, **kwargs):
+    """Ставит пересчёт списков, из которых пропадёт удаляемый рецепт."""
+    recipe_ids = list(
+        SimilarRecipe.objects.filter(similar=instance)
+        .values_list('recipe', flat=True)
+    )
+    if recipe_ids:
+        enqueue('refresh_similar_recipes', recipe_ids=recipe_ids)
+
+
+@receiver(recipe_composition_changed)
+def update_ingredient_index(sender, recipe, **kwargs):
+    """Обновляет индекс ингредиентов после фиксации транзакции."""
+    from recipes.ingredient_index import sync_recipe
+
+    transaction.on_commit(lambda: sync_recipe(recipe.id))
+
+
+def deleted_with_recipe(origin):
+    """Проверяет, что запись удаляется каскадом вместе с рецептом."""
+    if isinstance(origin, QuerySet):
+        return origin.model is Recipe
+    return isinstance(origin, Recipe)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(sender, instance, created, **kwargs):
+    """Прибавляет ингредиенты рецепта к итогам корзины."""
+    if created:
+        change_cart_totals(instance.user_id, instance.recipe_id, 1)
+    bump_cart_versions([instance.user_id])
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_removed(sender, instance, origin=None, **kwargs):
+    """Вычитает ингредиенты рецепта из итогов корзины."""
+    if deleted_with_recipe(origin):
+        # Итоги всех корзин уже поправил recipe_removed_from_carts.
+        return
+    change_cart_totals(instance.user_id, instance.recipe_id, -1)
+    bump_cart_versions([instance.user_id])
+
+
+def schedule_cart_shift(user_ids, difference):
+    """Меняет итоги корзин пользователей после фиксации транзакции.
+
+    Если корзин много, изменение уходит в очередь задач, чтобы не
+    задерживать запрос.
+    """
+    user_ids = list(user_ids)
+    difference = {
+        ingredient_id: delta
+        for ingredient_id, delta in difference.items() if delta
+    }
+    if not user_ids or not difference:
+        return
+    if len(user_ids) > CART_SYNC_MAX_USERS:
+        enqueue(
+            'shift_cart_totals',
+            user_ids=user_ids,
+            difference=list(difference.items()),
+        )
+        return
+    transaction.on_commit(lambda: shift_cart_totals(user_ids, difference))
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_removed_from_carts(sender, instance, **kwargs):
+    """Вычитает удаляемый рецепт из итогов всех корзин разом."""
+    schedule_cart_shift(cart_users(instance), {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(instance.id).items()
+    })
+
+
+@receiver(recipe_composition_changed)
+def update_cart_totals(sender, recipe, previous_amounts=None, **kwargs):
+    """Меняет итоги корзин на разницу в составе изменённого рецепта."""
+    if previous_amounts is None:
+        return
+    user_ids = list(cart_users(recipe))
+    if not user_ids:
+        return
+    amounts = recipe_amounts(recipe.id)
+    schedule_cart_shift(user_ids, {
+        ingredient_id: (
+            amounts.get(ingredient_id, 0)
+            - previous_amounts.get(ingredient_id, 0)
+        )
+        for ingredient_id in amounts.keys() | previous_amounts.keys()
+    })
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    """Отмечает изменение избранного пользователя."""
+    bump_user_version(instance.user_id)
+
+
+RANKING_KINDS = {Favorite: 'favorites', ShoppingCart: 'carts'}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def ranking_event_added(sender, instance, created, **kwargs):
+    """Учитывает добавление в оценках популярности рецепта."""
+    if created:
+        record_event(
+            instance.recipe_id, instance.created_at, RANKING_KINDS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def ranking_event_removed(sender, instance, origin=None, **kwargs):
+    """Вычитает удалённое добавление из оценок популярности рецепта."""
+    if deleted_with_recipe(origin):
+        # Удаляется сам рецепт, его оценки уже не нужны.
+        return
+    record_event(
+        instance.recipe_id, instance.created_at, RANKING_KINDS[sender], -1
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_changed(sender, instance, created=False, **kwargs):
+    """Обновляет дату изменения рецептов с изменённым тегом."""
+    if not created:
+        Recipe.objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_changed(sender, instance, created=False, **kwargs):
+    """Обновляет дату изменения рецептов с изменённым ингредиентом."""
+    if not created:
+        Recipe.objects.filter(
+            recipe_ingredients__ingredient=instance
+        ).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_names_changed(sender, **kwargs):
+    """Сбрасывает триграммный индекс названий ингредиентов."""
+    trigram_index.invalidate()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def reference_data_changed(sender, **kwargs):
+    """Сбрасывает реестр тегов и ингредиентов после фиксации."""
+    transaction.on_commit(reference_data.invalidate)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    """Обновляет дату изменения рецептов при правке профиля автора."""
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    Recipe.objects.filter(author=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_image_saving(sender, instance, update_fields, **kwargs):
+    remember_file(sender, instance, 'image', update_fields)
+
+
+@receiver(pre_save, sender=User)
+def avatar_saving(sender, instance, update_fields, **kwargs):
+    remember_file(sender, instance, 'avatar', update_fields)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(sender, instance, **kwargs):
+    """Переносит ссылку на изображение рецепта в счётчиках файлов."""
+    track_file_change(instance, 'image')
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(sender, instance, **kwargs):
+    """Переносит ссылку на аватар в счётчиках файлов."""
+    track_file_change(instance, 'avatar')
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def media_owner_deleted(sender, instance, **kwargs):
+    """Снимает ссылку на файл удалённой записи."""
+    field_name = 'image' if sender is Recipe else 'avatar'
+    remove_reference(getattr(instance, field_name).name)
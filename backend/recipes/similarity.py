@@ -0,0 +1,208 @@
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+from scipy import sparse
+
+from foodgram_backend.constants import (SIMILAR_BATCH_SIZE,
+                                        SIMILAR_MAX_CANDIDATES,
+                                        SIMILAR_RECIPES_COUNT)
+from recipes.models import Recipe, RecipeIngredient, SimilarRecipe
+
+
+def _pairs(queryset, *fields):
+    return np.array(
+        list(queryset.values_list(*fields)), dtype=np.int64
+    ).reshape(-1, 2)
+
+
+def load_features(recipes=None):
+    """Строит разреженную бинарную матрицу рецепт × (ингредиенты и теги).
+
+    Возвращает отсортированный массив id рецептов, соответствующий
+    строкам матрицы, и саму матрицу в формате CSR.
+    """
+    ingredients = RecipeIngredient.objects.all()
+    tags = Recipe.tags.through.objects.all()
+    if recipes is not None:
+        ingredients = ingredients.filter(recipe__in=recipes)
+        tags = tags.filter(recipe__in=recipes)
+    ingredient_pairs = _pairs(ingredients, 'recipe_id', 'ingredient_id')
+    tag_pairs = _pairs(tags, 'recipe_id', 'tag_id')
+    tag_pairs[:, 1] += ingredient_pairs[:, 1].max(initial=0) + 1
+    pairs = np.concatenate((ingredient_pairs, tag_pairs))
+    recipe_ids = np.unique(pairs[:, 0])
+    matrix = sparse.csr_matrix(
+        (
+            np.ones(len(pairs), dtype=np.float32),
+            (np.searchsorted(recipe_ids, pairs[:, 0]), pairs[:, 1]),
+        ),
+        shape=(len(recipe_ids), pairs[:, 1].max(initial=0) + 1),
+    )
+    matrix.data[:] = 1
+    return recipe_ids, matrix
+
+
+def top_neighbors(matrix, rows, count=SIMILAR_RECIPES_COUNT):
+    """Находит для строк ``rows`` ближайших соседей по Жаккару.
+
+    Пересечения считаются одним умножением разреженных матриц на всю
+    пачку строк, выдаёт пары (строка, строки соседей, коэффициенты).
+    """
+    sizes = np.asarray(matrix.sum(axis=1)).ravel()
+    overlap = (matrix[rows] @ matrix.T).tocsr()
+    row_of = np.repeat(rows, np.diff(overlap.indptr))
+    scores = overlap.data / (
+        sizes[row_of] + sizes[overlap.indices] - overlap.data
+    )
+    scores[overlap.indices == row_of] = 0
+    for position, row in enumerate(rows):
+        start, end = overlap.indptr[position], overlap.indptr[position + 1]
+        row_scores = scores[start:end]
+        columns = overlap.indices[start:end]
+        if len(row_scores) > count:
+            best = np.argpartition(-row_scores, count)[:count]
+            row_scores, columns = row_scores[best], columns[best]
+        positive = row_scores > 0
+        yield row, columns[positive], row_scores[positive]
+
+
+def _similar_objects(recipe_ids, row, columns, scores):
+    return [
+        SimilarRecipe(
+            recipe_id=recipe_ids[row],
+            similar_id=recipe_ids[column],
+            score=score,
+        )
+        for column, score in zip(columns.tolist(), scores.tolist())
+    ]
+
+
+def _replace_lists(recipe_ids, matrix, rows, batch_size):
+    objects = []
+    for row, columns, scores in top_neighbors(matrix, rows):
+        objects += _similar_objects(recipe_ids, row, columns, scores)
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(
+            recipe__in=[recipe_ids[row] for row in rows.tolist()]
+        ).delete()
+        SimilarRecipe.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def rebuild_similar_recipes(batch_size=SIMILAR_BATCH_SIZE):
+    """Пересчитывает похожие рецепты для всего каталога пачками.
+
+    Каждая пачка записывается в своей транзакции, поэтому списки
+    остальных рецептов доступны на всё время пересчёта.
+    """
+    recipe_ids, matrix = load_features()
+    recipe_ids = recipe_ids.tolist()
+    for start in range(0, len(recipe_ids), batch_size):
+        rows = np.arange(start, min(start + batch_size, len(recipe_ids)))
+        _replace_lists(recipe_ids, matrix, rows, batch_size)
+    SimilarRecipe.objects.exclude(recipe__in=recipe_ids).delete()
+    return len(recipe_ids)
+
+
+def candidate_ids(recipe_ids, limit=SIMILAR_MAX_CANDIDATES):
+    """Рецепты, которые могут оказаться похожими на ``recipe_ids``.
+
+    Кандидаты берутся по самым редким ингредиентам рецептов, пока их
+    не наберётся ``limit``. Частые ингредиенты вроде соли встречаются
+    почти везде и почти не влияют на сходство, но без ограничения
+    делали бы кандидатом весь каталог.
+    """
+    ingredients = RecipeIngredient.objects.filter(recipe__in=recipe_ids)
+    frequencies = (
+        RecipeIngredient.objects.filter(
+            ingredient__in=ingredients.values('ingredient')
+        )
+        .values('ingredient')
+        .annotate(recipes=Count('id'))
+        .order_by('recipes')
+        .values_list('ingredient', 'recipes')
+    )
+    rare, total = [], 0
+    for ingredient_id, recipes in frequencies:
+        if rare and total + recipes > limit:
+            break
+        rare.append(ingredient_id)
+        total += recipes
+    candidates = set(recipe_ids)
+    candidates.update(
+        RecipeIngredient.objects.filter(ingredient__in=rare)
+        .values_list('recipe', flat=True)[:limit]
+    )
+    return list(candidates)
+
+
+def refresh_similar_recipes(recipe_ids, batch_size=SIMILAR_BATCH_SIZE):
+    """Пересчитывает списки похожих рецептов для ``recipe_ids``.
+
+    Каждый рецепт сравнивается только со своими кандидатами по редким
+    ингредиентам.
+    """
+    for recipe_id in recipe_ids:
+        features_ids, matrix = load_features(candidate_ids([recipe_id]))
+        features_ids = features_ids.tolist()
+        if recipe_id not in features_ids:
+            SimilarRecipe.objects.filter(recipe=recipe_id).delete()
+            continue
+        _replace_lists(
+            features_ids, matrix,
+            np.array([features_ids.index(recipe_id)]), batch_size,
+        )
+
+
+def update_similar_recipes(recipe_id):
+    """Обновляет похожие рецепты после изменения одного рецепта.
+
+    Список самого рецепта пересчитывается, и рецепт вставляется в списки
+    кандидатов, которым подходит лучше их худшего соседа. Рецепты, в
+    списках которых он уже был, пересчитываются целиком: если сходство
+    упало, его место должен занять следующий по сходству рецепт.
+    Полный пересчёт выполняет команда ``build_similar_recipes``.
+    """
+    listers = set(
+        SimilarRecipe.objects.filter(similar=recipe_id)
+        .values_list('recipe', flat=True)
+    )
+    features_ids, matrix = load_features(candidate_ids([recipe_id]))
+    features_ids = features_ids.tolist()
+    if recipe_id not in features_ids:
+        SimilarRecipe.objects.filter(recipe=recipe_id).delete()
+        refresh_similar_recipes(listers)
+        return
+    row = features_ids.index(recipe_id)
+    _, columns, scores = next(
+        top_neighbors(matrix, np.array([row]), count=len(features_ids))
+    )
+    _replace_lists(
+        features_ids, matrix, np.array([row]), SIMILAR_BATCH_SIZE
+    )
+    scores = {
+        features_ids[column]: score
+        for column, score in zip(columns.tolist(), scores.tolist())
+        if features_ids[column] not in listers
+    }
+    neighbors = defaultdict(list)
+    for similar_id, neighbor_id, score in SimilarRecipe.objects.filter(
+        recipe__in=scores
+    ).values_list('recipe', 'id', 'score'):
+        neighbors[similar_id].append((score, neighbor_id))
+    added, dropped = [], []
+    for similar_id, score in scores.items():
+        current = neighbors[similar_id]
+        if len(current) >= SIMILAR_RECIPES_COUNT:
+            worst = min(current)
+            if score <= worst[0]:
+                continue
+            dropped.append(worst[1])
+        added.append(SimilarRecipe(
+            recipe_id=similar_id, similar_id=recipe_id, score=score
+        ))
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(id__in=dropped).delete()
+        SimilarRecipe.objects.bulk_create(added)
+    refresh_similar_recipes(listers)
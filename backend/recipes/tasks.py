@@ -0,0 +1,41 @@
+from recipes.feed import fan_out_recipe, update_author_mode
+from recipes.shopping_list import shift_cart_totals
+from tasks.queue import task
+
+
+@task('fan_out_recipe')
+def fan_out(recipe_id):
+    """Раскладывает новый рецепт по лентам подписчиков автора."""
+    fan_out_recipe(recipe_id)
+
+
+@task('update_author_mode')
+def author_mode(publisher_id):
+    """Переключает режим ленты автора после отписки."""
+    update_author_mode(publisher_id)
+
+
+@task('update_similar_recipes')
+def similar_recipes(recipe_id):
+    """Обновляет похожие рецепты после изменения рецепта."""
+    # NumPy и SciPy загружаются только в воркере задач.
+    from recipes.similarity import update_similar_recipes
+
+    update_similar_recipes(recipe_id)
+
+
+@task('refresh_similar_recipes')
+def refresh_similar(recipe_ids):
+    """Пересчитывает списки похожих рецептов после удаления рецепта."""
+    from recipes.similarity import refresh_similar_recipes
+
+    refresh_similar_recipes(recipe_ids)
+
+
+@task('shift_cart_totals')
+def cart_totals(user_ids, difference):
+    """Меняет итоги корзин, в которых лежит изменённый рецепт.
+
+    ``difference`` — пары (id ингредиента, изменение количества).
+    """
+    shift_cart_totals(user_ids, dict(difference))
@@ -0,0 +1,260 @@
+import json
+import os
+import shutil
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Case, DateTimeField, When
+from django.utils.dateparse import parse_datetime
+
+from foodgram_backend.constants import TRANSFER_BATCH_SIZE
+from recipes.cache import recipe_ids
+from recipes.ingredient_search import trigram_index
+from recipes.media import add_reference
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.registry import reference_data
+
+User = get_user_model()
+
+USER_FIELDS = ('email', 'username', 'first_name', 'last_name')
+IMAGE_DIRECTORY = Recipe._meta.get_field('image').upload_to
+
+
+def dump_line(data):
+    return json.dumps(data, ensure_ascii=False)
+
+
+def export_lines(media_dir=None, batch_size=TRANSFER_BATCH_SIZE):
+    """Выгружает авторов и рецепты построчно в формате JSONL.
+
+    Рецепты читаются итератором пачками по ``batch_size`` вместе со
+    связями, поэтому память не зависит от их числа. Теги и ингредиенты
+    ссылаются на естественные ключи, изображения — на имя файла в
+    хранилище, которое содержит SHA-256 содержимого. С ``media_dir``
+    файлы изображений копируются в этот каталог.
+    """
+    for user in User.objects.filter(recipes__isnull=False).distinct().values(
+        *USER_FIELDS
+    ).order_by('id').iterator(chunk_size=batch_size):
+        yield dump_line({'type': 'user', **user})
+    for recipe in Recipe.objects.select_related('author').prefetch_related(
+        'tags', 'recipe_ingredients__ingredient'
+    ).order_by('id').iterator(chunk_size=batch_size):
+        if media_dir and recipe.image:
+            copy_file(recipe.image.name, media_dir)
+        yield dump_line({
+            'type': 'recipe',
+            'id': recipe.id,
+            'author': recipe.author.email,
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'pub_date': recipe.pub_date.isoformat(),
+            'image': recipe.image.name,
+            'tags': [[tag.name, tag.slug] for tag in recipe.tags.all()],
+            'ingredients': [
+                [item.ingredient.name, item.ingredient.measurement_unit,
+                 item.amount]
+                for item in recipe.recipe_ingredients.all()
+            ],
+        })
+
+
+def copy_file(name, media_dir):
+    """Копирует файл хранилища в каталог выгрузки, если его там нет."""
+    target = os.path.join(media_dir, name)
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with default_storage.open(name) as source, open(target, 'wb') as copy:
+        shutil.copyfileobj(source, copy)
+
+
+class RecipeImporter:
+    """Загружает рецепты из JSONL пачками через bulk_create.
+
+    id рецептов источника не переносятся: рецепты получают новые id,
+    а связи создаются по id, возвращённым bulk_create. Рецепт, который
+    уже есть у автора с тем же названием и датой публикации, пропускается,
+    поэтому повторная загрузка того же файла безопасна.
+    """
+
+    def __init__(self, media_dir=None):
+        self.media_dir = media_dir
+        self.authors = {}
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): ingredient_id for ingredient_id, name, unit in
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+        }
+        self.stats = Counter()
+
+    def import_batch(self, lines):
+        records = [json.loads(line) for line in lines if line.strip()]
+        users = [item for item in records if item['type'] == 'user']
+        recipes = [item for item in records if item['type'] == 'recipe']
+        with transaction.atomic():
+            if users:
+                self.import_users(users)
+            if recipes:
+                self.import_recipes(recipes)
+
+    def import_users(self, users):
+        User.objects.bulk_create(
+            (
+                User(
+                    **{field: user[field] for field in USER_FIELDS},
+                    password='!',
+                )
+                for user in users
+            ),
+            ignore_conflicts=True,
+        )
+        self.authors.update(
+            User.objects.filter(
+                email__in=[user['email'] for user in users]
+            ).values_list('email', 'id')
+        )
+
+    def ensure_references(self, recipes):
+        """Создаёт теги и ингредиенты, которых нет в этой базе."""
+        tags = {
+            slug: name for item in recipes for name, slug in item['tags']
+            if slug not in self.tags
+        }
+        if tags:
+            Tag.objects.bulk_create(
+                (Tag(name=name, slug=slug) for slug, name in tags.items()),
+                ignore_conflicts=True,
+            )
+            self.tags.update(
+                Tag.objects.filter(slug__in=tags).values_list('slug', 'id')
+            )
+        ingredients = {
+            (name, unit) for item in recipes
+            for name, unit, _ in item['ingredients']
+            if (name, unit) not in self.ingredients
+        }
+        if ingredients:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in ingredients
+                ),
+                ignore_conflicts=True,
+            )
+            for ingredient_id, name, unit in Ingredient.objects.filter(
+                name__in={name for name, _ in ingredients}
+            ).values_list('id', 'name', 'measurement_unit'):
+                self.ingredients[name, unit] = ingredient_id
+            trigram_index.invalidate()
+
+    def store_image(self, name):
+        """Сохраняет изображение из выгрузки или ссылается на имеющееся.
+
+        Имя файла в хранилище содержит хэш содержимого, поэтому файл,
+        который уже есть в хранилище, повторно не записывается.
+        """
+        if not name or default_storage.exists(name):
+            return name
+        path = self.media_dir and os.path.join(self.media_dir, name)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as image:
+                return default_storage.save(
+                    os.path.join(IMAGE_DIRECTORY, os.path.basename(name)),
+                    File(image),
+                )
+        self.stats['missing_images'] += 1
+        return name
+
+    def import_recipes(self, recipes):
+        self.ensure_references(recipes)
+        # При продолжении загрузки строки авторов могли быть уже пропущены.
+        self.authors.update(User.objects.filter(email__in={
+            item['author'] for item in recipes
+            if item['author'] not in self.authors
+        }).values_list('email', 'id'))
+        for item in recipes:
+            item['author_id'] = self.authors.get(item['author'])
+            item['pub_date'] = parse_datetime(item['pub_date'])
+        known = [item for item in recipes if item['author_id'] is not None]
+        self.stats['unknown_authors'] += len(recipes) - len(known)
+        existing = set(Recipe.objects.filter(
+            author__in={item['author_id'] for item in known},
+            pub_date__in={item['pub_date'] for item in known},
+        ).values_list('author', 'name', 'pub_date'))
+        recipes = [
+            item for item in known
+            if (item['author_id'], item['name'], item['pub_date'])
+            not in existing
+        ]
+        self.stats['skipped'] += len(known) - len(recipes)
+        if not recipes:
+            return
+        created = Recipe.objects.bulk_create(
+            Recipe(
+                author_id=item['author_id'],
+                name=item['name'],
+                text=item['text'],
+                cooking_time=item['cooking_time'],
+                image=self.store_image(item['image']),
+            )
+            for item in recipes
+        )
+        # auto_now_add заменяет дату публикации, возвращаем исходную.
+        pub_date = Case(
+            *(
+                When(id=recipe.id, then=item['pub_date'])
+                for recipe, item in zip(created, recipes)
+            ),
+            output_field=DateTimeField(),
+        )
+        Recipe.objects.filter(
+            id__in=[recipe.id for recipe in created]
+        ).update(pub_date=pub_date, updated_at=pub_date)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe_id=recipe.id,
+                ingredient_id=self.ingredients[name, unit],
+                amount=amount,
+            )
+            for recipe, item in zip(created, recipes)
+            for name, unit, amount in item['ingredients']
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=self.tags[slug])
+            for recipe, item in zip(created, recipes)
+            for _, slug in item['tags']
+        )
+        # bulk_create не отправляет сигналы, ссылки на файлы учитываются
+        # здесь.
+        for name, count in Counter(
+            recipe.image.name for recipe in created
+        ).items():
+            add_reference(name, count)
+        self.stats['created'] += len(created)
+
+    def finish(self):
+        """Сбрасывает снимки, которые bulk_create не обновляет."""
+        from recipes.ingredient_index import ingredient_index
+
+        recipe_ids.invalidate()
+        ingredient_index.invalidate()
+        reference_data.invalidate()
+
+
+def read_batches(file, batch_size=TRANSFER_BATCH_SIZE, skip=0):
+    """Читает файл пачками строк, пропуская первые ``skip`` строк."""
+    batch = []
+    for number, line in enumerate(file, 1):
+        if number <= skip:
+            continue
+        batch.append(line)
+        if len(batch) == batch_size:
+            yield number, batch
+            batch = []
+    if batch:
+        yield number, batch
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from tasks.models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'owner', 'created_at')
+    list_filter = ('status', 'name')
+    raw_id_fields = ('owner',)
@@ -0,0 +1,94 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from time import monotonic, sleep
+
+import django
+from django.core.management.base import BaseCommand
+
+from foodgram_backend.constants import (TASK_CONCURRENCY, TASK_POLL_INTERVAL,
+                                        TASK_PRUNE_INTERVAL)
+from tasks.queue import claim, execute, fail, prune
+
+
+class Command(BaseCommand):
+    """Команда запуска воркера фоновых задач."""
+    help = 'Выполняет задачи из очереди в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=TASK_CONCURRENCY,
+            help='Количество одновременно выполняемых задач'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=TASK_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, сек.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить задачи из очереди и завершиться'
+        )
+
+    def prune(self):
+        """Раз в TASK_PRUNE_INTERVAL удаляет старые задачи и их файлы."""
+        if monotonic() - self.pruned_at < TASK_PRUNE_INTERVAL:
+            return
+        self.pruned_at = monotonic()
+        removed = prune()
+        if removed:
+            self.stdout.write(f'Удалено старых задач: {removed}')
+
+    def run_pool(self, concurrency, poll_interval, once):
+        """Выполняет задачи в пуле процессов.
+
+        Возвращает False, если пул сломался: дочерний процесс завершился
+        аварийно, например из-за нехватки памяти. Задачи, которые
+        выполнялись в пуле, возвращаются в очередь как упавшие.
+        """
+        running, claimed = {}, []
+        # Дочерние процессы запускаются заново, а не копией родителя:
+        # иначе они унаследуют его открытые соединения с БД.
+        with ProcessPoolExecutor(
+            max_workers=concurrency,
+            mp_context=get_context('spawn'),
+            initializer=django.setup,
+        ) as pool:
+            try:
+                while True:
+                    self.prune()
+                    claimed = claim(concurrency - len(running))
+                    while claimed:
+                        future = pool.submit(execute, claimed[0])
+                        running[future] = claimed.pop(0)
+                    if not running:
+                        if once:
+                            return True
+                        sleep(poll_interval)
+                        continue
+                    done, _ = wait(
+                        running, timeout=poll_interval,
+                        return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        task_id = running.pop(future)
+                        error = future.exception()
+                        if isinstance(error, BrokenProcessPool):
+                            running[future] = task_id
+                            raise error
+                        if error is None:
+                            self.stdout.write(f'Задача {task_id} выполнена')
+                        else:
+                            fail(task_id, error)
+                            self.stderr.write(f'Задача {task_id}: {error}')
+            except BrokenProcessPool as error:
+                for task_id in [*running.values(), *claimed]:
+                    fail(task_id, error)
+                    self.stderr.write(f'Задача {task_id}: пул процессов упал')
+                return False
+
+    def handle(self, *args, **options):
+        self.pruned_at = -TASK_PRUNE_INTERVAL
+        while not self.run_pool(
+            options['concurrency'], options['poll_interval'], options['once']
+        ):
+            self.stderr.write('Пул процессов перезапущен')
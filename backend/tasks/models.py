@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils import timezone
+
+from foodgram_backend import constants
+
+User = get_user_model()
+
+
+class Task(models.Model):
+    """Модель фоновой задачи в очереди."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        max_length=constants.TASK_NAME_LENGTH,
+        verbose_name='Задача',
+    )
+    payload = models.JSONField('Аргументы', default=dict)
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tasks',
+        verbose_name='Владелец',
+    )
+    status = models.CharField(
+        max_length=constants.TASK_STATUS_LENGTH,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveIntegerField(
+        'Максимум попыток', default=constants.TASK_MAX_ATTEMPTS
+    )
+    run_after = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    result = models.FileField(
+        verbose_name='Результат',
+        upload_to='tasks',
+        blank=True,
+    )
+    result_name = models.CharField(
+        max_length=constants.MEDIA_NAME_LENGTH,
+        blank=True,
+        verbose_name='Имя файла результата',
+    )
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'], name='task_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
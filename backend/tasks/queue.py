@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from foodgram_backend.constants import (TASK_LOCK_TIMEOUT, TASK_RESULT_TTL,
+                                        TASK_RETRY_DELAY)
+from foodgram_backend.db_router import pin_primary
+from tasks.models import Task
+
+registry = {}
+
+
+def task(name):
+    """Регистрирует функцию как фоновую задачу с указанным именем.
+
+    Функция принимает аргументы из payload и может вернуть пару
+    (имя файла, содержимое в байтах), которая сохраняется как результат.
+    """
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, owner=None, **payload):
+    """Ставит задачу в очередь и возвращает её запись."""
+    if name not in registry:
+        raise KeyError(f'Задача {name} не зарегистрирована.')
+    return Task.objects.create(name=name, owner=owner, payload=payload)
+
+
+@pin_primary()
+def claim(limit):
+    """Забирает в работу до ``limit`` готовых к запуску задач.
+
+    Задача переводится в работу условным UPDATE, поэтому несколько
+    воркеров не возьмут одну задачу даже без SELECT ... FOR UPDATE.
+    Зависшие задачи упавших воркеров возвращаются в очередь.
+    Очередь читается из основной базы: реплика может не успеть получить
+    только что поставленные задачи.
+    """
+    now = timezone.now()
+    Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=now - timedelta(seconds=TASK_LOCK_TIMEOUT),
+    ).update(status=Task.PENDING)
+    claimed = []
+    for task_id in Task.objects.filter(
+        status=Task.PENDING, run_after__lte=now
+    ).order_by('run_after').values_list('id', flat=True)[:limit]:
+        if Task.objects.filter(id=task_id, status=Task.PENDING).update(
+            status=Task.RUNNING, locked_at=now
+        ):
+            claimed.append(task_id)
+    return claimed
+
+
+@pin_primary()
+def execute(task_id):
+    """Выполняет задачу; вызывается в процессе пула воркера."""
+    task = Task.objects.get(id=task_id)
+    Task.objects.filter(id=task_id).update(attempts=task.attempts + 1)
+    result = registry[task.name](**task.payload)
+    if result is not None:
+        filename, content = result
+        task.result.save(filename, ContentFile(content), save=False)
+    Task.objects.filter(id=task_id).update(
+        status=Task.DONE,
+        result=task.result.name or '',
+        result_name=result[0] if result else '',
+        error='',
+    )
+
+
+@pin_primary()
+def fail(task_id, error):
+    """Возвращает упавшую задачу в очередь с задержкой или завершает её."""
+    task = Task.objects.get(id=task_id)
+    if task.attempts < task.max_attempts:
+        Task.objects.filter(id=task_id).update(
+            status=Task.PENDING,
+            error=str(error),
+            run_after=timezone.now() + timedelta(
+                seconds=TASK_RETRY_DELAY * 2 ** task.attempts
+            ),
+        )
+    else:
+        Task.objects.filter(id=task_id).update(
+            status=Task.FAILED, error=str(error)
+        )
+
+
+@pin_primary()
+def prune(ttl=TASK_RESULT_TTL):
+    """Удаляет завершённые более ``ttl`` секунд назад задачи и их файлы.
+
+    Одинаковые результаты хранятся одним файлом, поэтому файл удаляется,
+    только если на него не ссылается ни одна оставшаяся задача.
+    """
+    expired = Task.objects.filter(
+        status__in=(Task.DONE, Task.FAILED),
+        run_after__lt=timezone.now() - timedelta(seconds=ttl),
+    )
+    names = set(expired.exclude(result='').values_list('result', flat=True))
+    count, _ = expired.delete()
+    names -= set(
+        Task.objects.filter(result__in=names).values_list('result', flat=True)
+    )
+    for name in names:
+        default_storage.purge(name)
+    return count
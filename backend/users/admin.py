@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from foodgram_backend.pagination import EstimatedCountPaginator
 from users.models import CustomUser, Subscription
 
 
@@ -24,5 +25,8 @@ class CustomUserModel(admin.ModelAdmin):
 @admin.register(Subscription)
 class Subscription(admin.ModelAdmin):
     list_display = ("follower", "publisher")
-    list_editable = ("publisher",)
     list_display_links = ("follower",)
+    list_select_related = ("follower", "publisher")
+    autocomplete_fields = ("follower", "publisher")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -1,13 +1,31 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.memo import MemoizedRepresentationMixin
+from api.sparse import SparseFieldsetMixin
 from users.models import Subscription
 
 User = get_user_model()
 
+# Столбцы пользователя, которые читает CustomUserProfileSerializer.
+USER_COLUMNS = (
+    'email', 'id', 'username', 'first_name', 'last_name', 'avatar'
+)
+
+
+def subscription_exists(user, publisher='pk'):
+    """Подзапрос: подписан ли ``user`` на автора из внешнего запроса.
+
+    Используется для аннотации is_subscribed сразу для всей страницы.
+    """
+    return Exists(Subscription.objects.filter(
+        follower=user.id, publisher=OuterRef(publisher)
+    ))
+
 
 class AvatarSerializer(serializers.ModelSerializer):
     avatar = Base64ImageField()
@@ -22,7 +40,9 @@ class AvatarSerializer(serializers.ModelSerializer):
         return data
 
 
-class CustomUserProfileSerializer(UserSerializer):
+class CustomUserProfileSerializer(
+    MemoizedRepresentationMixin, SparseFieldsetMixin, UserSerializer
+):
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField()
 
@@ -39,6 +59,8 @@ class CustomUserProfileSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return self._check_subscription_status(
             self.context.get('request'), obj
         )
@@ -109,6 +131,8 @@ class SubscribeGetSerializer(CustomUserProfileSerializer):
         )
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
     def get_recipes(self, obj):
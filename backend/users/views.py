@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Value
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -7,9 +8,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from api.pagination import LimitPagination
+from api.sparse import sparse_fieldset
 from users.models import Subscription
-from users.serializers import (AvatarSerializer, CustomUserProfileSerializer,
-                               SubscribeGetSerializer, SubscribeSerializer)
+from users.serializers import (USER_COLUMNS, AvatarSerializer,
+                               CustomUserProfileSerializer,
+                               SubscribeGetSerializer, SubscribeSerializer,
+                               subscription_exists)
 
 User = get_user_model()
 
@@ -21,6 +25,20 @@ class UserViewSet(UserViewSet):
     serializer_class = CustomUserProfileSerializer
     pagination_class = LimitPagination
 
+    def get_queryset(self):
+        """Загружает только столбцы, нужные для полей из ?fields=."""
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            fields, _ = sparse_fieldset(
+                self.request, CustomUserProfileSerializer.Meta.fields
+            )
+            queryset = queryset.only('id', *(fields & set(USER_COLUMNS)))
+            if 'is_subscribed' in fields:
+                queryset = queryset.annotate(
+                    is_subscribed=subscription_exists(self.request.user)
+                )
+        return queryset
+
     @action(
         detail=True,
         methods=['post'],
@@ -71,10 +89,15 @@ class UserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def subscriptions(self, request):
-        subscriptions = Subscription.objects.filter(follower=request.user)
-        pages = self.paginate_queryset(subscriptions)
+        publishers = User.objects.filter(
+            following__follower=request.user
+        ).annotate(
+            is_subscribed=Value(True),
+            recipes_count=Count('recipes'),
+        ).order_by('username')
+        pages = self.paginate_queryset(publishers)
         serializer = SubscribeGetSerializer(
-            [subscription.publisher for subscription in pages],
+            pages,
             many=True,
             context={'request': request}
         )